@@ -0,0 +1,156 @@
+# app/analytics.py
+"""
+Векторизованная аналитика активности на NumPy.
+Из хранилища один раз читается агрегат (набор тегов, день) -> количество;
+он кэшируется до следующей записи (ключ — version хранилища). RecipeDB
+считает агрегат в SQL (GROUP BY), остальные RecipeStore — одним проходом
+iter_all по двум столбцам. Гистограммы,
+скользящие средние и ряды по тегам считаются взвешенными bincount по этим
+массивам без циклов Python: все результаты не мельче дня, поэтому
+построчные данные не нужны.
+"""
+
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .models import RecipeDB, RecipeStore, split_tags, to_epoch
+
+DAY = "day"
+WEEK = "week"
+MONTH = "month"
+
+
+class ActivityAnalytics:
+    def __init__(self, db: RecipeStore):
+        self.db = db
+        self._version = None
+        self._cache: Dict = {}
+
+    # -----------------------
+    # Загрузка столбцов
+    # -----------------------
+    def _columns(self) -> Dict[str, np.ndarray]:
+        version = self.db.version
+        if version != self._version:
+            self._cache = {"columns": self._load_columns()}
+            self._version = version
+        return self._cache["columns"]
+
+    def _aggregate(self) -> Iterable[Tuple[str, int, int]]:
+        """Строки (теги, день от epoch, количество живых рецептов)."""
+        if isinstance(self.db, RecipeDB):
+            cur = self.db.conn.cursor()
+            cur.execute("""
+            SELECT tags, created_at / 86400 AS day, COUNT(*) AS cnt
+            FROM recipes
+            WHERE deleted_at IS NULL
+            GROUP BY tags, day
+            """)
+            return cur
+        counts = Counter((tags or "", to_epoch(created_at) // 86400)
+                         for tags, created_at in self.db.iter_all(("tags", "created_at")))
+        return ((tags, day, cnt) for (tags, day), cnt in counts.items())
+
+    def _load_columns(self) -> Dict[str, np.ndarray]:
+        days: List[int] = []
+        weights: List[int] = []
+        tag_rows: List[int] = []
+        tag_codes: List[int] = []
+        codes: Dict[str, int] = {}
+        parsed: Dict[str, List[int]] = {}
+        for i, (tags, day, cnt) in enumerate(self._aggregate()):
+            days.append(day)
+            weights.append(cnt)
+            # одинаковые строки тегов повторяются для разных дней — разбираем каждую один раз
+            key = tags or ""
+            if key not in parsed:
+                parsed[key] = [codes.setdefault(tag, len(codes)) for tag in split_tags(key)]
+            for code in parsed[key]:
+                tag_rows.append(i)
+                tag_codes.append(code)
+        return {
+            "day": np.array(days, dtype=np.int64),
+            "count": np.array(weights, dtype=np.int64),
+            "tag_rows": np.array(tag_rows, dtype=np.int64),
+            "tag_codes": np.array(tag_codes, dtype=np.int64),
+            "tag_names": np.array(list(codes), dtype=object),
+        }
+
+    def _cached(self, key, compute):
+        self._columns()
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    # -----------------------
+    # Периоды
+    # -----------------------
+    def _periods(self, freq: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(номер периода для каждой группы, подписи всех периодов подряд от первого до последнего)."""
+        def compute():
+            days = self._columns()["day"]
+            if freq == DAY:
+                idx, unit, scale, shift = days, "D", 1, 0
+            elif freq == WEEK:
+                # 1970-01-01 — четверг; недели начинаются с понедельника
+                idx, unit, scale, shift = (days + 3) // 7, "D", 7, -3
+            elif freq == MONTH:
+                idx = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+                unit, scale, shift = "M", 1, 0
+            else:
+                raise ValueError(f"Неизвестная частота: {freq}")
+            if len(idx) == 0:
+                return idx, np.array([], dtype=f"datetime64[{unit}]")
+            lo, hi = idx.min(), idx.max()
+            labels = (np.arange(lo, hi + 1) * scale + shift).astype(f"datetime64[{unit}]")
+            return idx - lo, labels
+        return self._cached(("periods", freq), compute)
+
+    # -----------------------
+    # Результаты
+    # -----------------------
+    def histogram(self, freq: str = DAY) -> Tuple[np.ndarray, np.ndarray]:
+        """(начала периодов, количество рецептов), пустые периоды включены."""
+        def compute():
+            idx, labels = self._periods(freq)
+            counts = np.bincount(idx, weights=self._columns()["count"], minlength=len(labels))
+            return labels, counts.astype(np.int64)
+        return self._cached(("histogram", freq), compute)
+
+    def rolling_mean(self, window: int = 7, freq: str = DAY) -> Tuple[np.ndarray, np.ndarray]:
+        """Скользящее среднее по window периодам; подпись — последний период окна."""
+        labels, counts = self.histogram(freq)
+        if window < 1:
+            raise ValueError("window должен быть >= 1")
+        if len(counts) < window:
+            return labels[:0], np.array([], dtype=float)
+        csum = np.concatenate(([0], np.cumsum(counts)))
+        return labels[window - 1:], (csum[window:] - csum[:-window]) / window
+
+    def top_tags(self, n: int = 10) -> List[Tuple[str, int]]:
+        cols = self._columns()
+        weights = cols["count"][cols["tag_rows"]]
+        counts = np.bincount(cols["tag_codes"], weights=weights, minlength=len(cols["tag_names"])).astype(np.int64)
+        order = np.argsort(-counts, kind="stable")[:n]
+        return [(cols["tag_names"][i], int(counts[i])) for i in order]
+
+    def tag_series(self, freq: str = DAY, tags: Optional[Sequence[str]] = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Ряды по тегам на общей шкале периодов: (подписи, {тег: количество}).
+        Все теги считаются одним bincount по составному индексу (тег, период).
+        """
+        def compute():
+            cols = self._columns()
+            idx, labels = self._periods(freq)
+            n_tags, n_periods = len(cols["tag_names"]), len(labels)
+            flat = cols["tag_codes"] * n_periods + idx[cols["tag_rows"]]
+            weights = cols["count"][cols["tag_rows"]]
+            matrix = np.bincount(flat, weights=weights, minlength=n_tags * n_periods)
+            return labels, matrix.astype(np.int64).reshape(n_tags, n_periods)
+        labels, matrix = self._cached(("tag_series", freq), compute)
+        names = self._columns()["tag_names"]
+        wanted = None if tags is None else {t.strip().lower() for t in tags}
+        series = {name: matrix[i] for i, name in enumerate(names) if wanted is None or name in wanted}
+        return labels, series
@@ -0,0 +1,292 @@
+# app/backup.py
+"""
+Резервное копирование БД без остановки приложения.
+
+Копия снимается онлайн (RecipeDB.backup — sqlite3 backup API) небольшими
+шагами с паузами, поэтому запросы приложения ждут не дольше одного шага.
+Готовая копия проверяется PRAGMA integrity_check и только после этого
+появляется под своим именем — битых файлов в каталоге копий не бывает.
+
+BackupScheduler снимает копии по расписанию, пропуская их, если с прошлой
+копии БД не менялась, и хранит последние keep штук. Отсчёт интервала
+переживает перезапуск: он идёт от самой новой копии в каталоге.
+
+    python -m app.backup backup backups/            # разовая копия recipes.db
+    python -m app.backup list backups/
+    python -m app.backup verify backups/recipes-20260101-120000.db
+    python -m app.backup restore backups/recipes-20260101-120000.db --db recipes.db
+"""
+
+import argparse
+import datetime
+import glob
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from .models import BACKUP_PAGES, BACKUP_PAUSE, RecipeDB, RecipeError
+
+# Сколько последних копий хранить по умолчанию
+DEFAULT_KEEP = 7
+# Имя копии: recipes-ГГГГММДД-ЧЧММСС.db (по нему же сортируется ротация)
+NAME_PREFIX = "recipes-"
+NAME_FORMAT = "%Y%m%d-%H%M%S"
+
+
+class BackupError(RecipeError):
+    """Копия не снята, повреждена или не может быть восстановлена."""
+    pass
+
+
+@dataclass
+class BackupReport:
+    path: str
+    pages: int
+    page_size: int
+    duration: float          # секунды
+    version: int             # RecipeDB.version на момент начала копии
+
+    @property
+    def size_bytes(self) -> int:
+        return self.pages * self.page_size
+
+    def __str__(self) -> str:
+        return f"{self.path}: {self.size_bytes / 1024:.1f} КБ за {self.duration:.2f} с"
+
+
+def integrity_check(path: str) -> List[str]:
+    """Проблемы из PRAGMA integrity_check; пустой список — файл в порядке."""
+    if not os.path.isfile(path):
+        raise BackupError(f"Файл {path} не найден")
+    try:
+        conn = sqlite3.connect(path)
+        try:
+            rows = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as e:
+        return [str(e)]
+    return [] if rows == ["ok"] else rows
+
+
+def backup(db: RecipeDB, dest_path: str, pages: int = BACKUP_PAGES, pause: float = BACKUP_PAUSE,
+           progress: Optional[Callable[[int, int], None]] = None) -> BackupReport:
+    """
+    Снимает проверенную копию db в dest_path.
+    Копия пишется во временный файл рядом и подменяет dest_path только после integrity_check.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+    tmp = dest_path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    started = time.perf_counter()
+    version = db.version
+    try:
+        total = db.backup(tmp, pages=pages, pause=pause, progress=progress)
+        problems = integrity_check(tmp)
+        if problems:
+            raise BackupError(f"Копия {dest_path} не прошла проверку: {'; '.join(problems[:5])}")
+        os.replace(tmp, dest_path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    page_size = db.storage_stats()["page_size"]
+    return BackupReport(path=dest_path, pages=total, page_size=page_size,
+                        duration=time.perf_counter() - started, version=version)
+
+
+def list_backups(backup_dir: str) -> List[str]:
+    """Копии в каталоге от старых к новым."""
+    return sorted(glob.glob(os.path.join(backup_dir, f"{NAME_PREFIX}*.db")))
+
+
+def backup_time(path: str) -> float:
+    """Время снятия копии (unix epoch) по имени файла; для чужих имён — mtime."""
+    stamp = os.path.basename(path)[len(NAME_PREFIX):-len(".db")]
+    try:
+        return datetime.datetime.strptime(stamp, NAME_FORMAT).timestamp()
+    except ValueError:
+        return os.path.getmtime(path)
+
+
+def _copy_file_db(source_path: str, dest_path: str, pages: int) -> None:
+    """Копия sqlite3 backup API без RecipeDB: без миграций, VACUUM и смены режима журнала."""
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(dest_path)
+    try:
+        source.backup(target, pages=max(1, int(pages)))
+        # источник может быть в WAL — копия остаётся одним файлом
+        target.execute("PRAGMA journal_mode = DELETE").fetchone()
+    finally:
+        target.close()
+        source.close()
+
+
+def _before_restore_path(db_path: str) -> str:
+    """<db_path>.before-restore-ГГГГММДД-ЧЧММСС; прежние сохранения не перезаписываются."""
+    base = f"{db_path}.before-restore-{datetime.datetime.now().strftime(NAME_FORMAT)}"
+    path, n = base, 1
+    while os.path.exists(path):
+        path, n = f"{base}-{n}", n + 1
+    return path
+
+
+def restore(backup_path: str, db_path: str, pages: int = BACKUP_PAGES) -> str:
+    """
+    Восстанавливает db_path из копии. Текущая БД сначала сохраняется в
+    <db_path>.before-restore-<время> (у каждого восстановления своя).
+    Приложение на время восстановления лучше остановить: открытые
+    соединения увидят подменённые данные. Возвращает путь сохранённой
+    старой БД (или "", если её не было).
+    """
+    problems = integrity_check(backup_path)
+    if problems:
+        raise BackupError(f"Копия {backup_path} повреждена: {'; '.join(problems[:5])}")
+    saved = ""
+    if os.path.exists(db_path):
+        saved = _before_restore_path(db_path)
+        _copy_file_db(db_path, saved, pages)
+    # обратное копирование тем же API: запись в db_path идёт под блокировкой SQLite, без рваных файлов
+    source = sqlite3.connect(backup_path)
+    target = sqlite3.connect(db_path)
+    try:
+        source.backup(target, pages=max(1, int(pages)))
+    finally:
+        target.close()
+        source.close()
+    return saved
+
+
+class BackupScheduler:
+    def __init__(self, db: RecipeDB, backup_dir: str, interval: float = 6 * 3600.0,
+                 keep: int = DEFAULT_KEEP, pages: int = BACKUP_PAGES, pause: float = BACKUP_PAUSE,
+                 logger=None, on_report: Optional[Callable[[BackupReport], None]] = None):
+        """
+        Копирует через соединение самого приложения (db): его записи во время
+        копии попадают в неё без перезапуска, а чужое соединение перезапускало
+        бы копирование после каждой записи.
+        interval — промежуток между копиями; keep — сколько копий хранить.
+        """
+        self.db = db
+        self.backup_dir = backup_dir
+        self.interval = interval
+        self.keep = keep
+        self.pages = pages
+        self.pause = pause
+        self.logger = logger
+        self.on_report = on_report
+        self.last_report: Optional[BackupReport] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _check_stop(self, remaining: int, total: int) -> None:
+        if self._stop.is_set():
+            raise BackupError("Резервное копирование прервано остановкой приложения")
+
+    def run_once(self, force: bool = False) -> Optional[BackupReport]:
+        """Снимает копию, если БД менялась с прошлой (или force). None — копия не нужна."""
+        if not force and self.last_report is not None and self.db.version == self.last_report.version:
+            return None
+        name = NAME_PREFIX + datetime.datetime.now().strftime(NAME_FORMAT) + ".db"
+        report = backup(self.db, os.path.join(self.backup_dir, name), pages=self.pages,
+                        pause=self.pause, progress=self._check_stop)
+        self.last_report = report
+        self._rotate()
+        if self.logger:
+            self.logger.info(f"Резервная копия БД: {report}")
+        if self.on_report:
+            self.on_report(report)
+        return report
+
+    def _rotate(self) -> None:
+        for path in list_backups(self.backup_dir)[:-max(1, self.keep)]:
+            os.remove(path)
+
+    def initial_delay(self) -> float:
+        """
+        Сколько ждать первой копии после старта: остаток интервала от самой
+        новой копии в каталоге. Иначе каждый перезапуск снимал бы полную копию
+        сразу, и частые перезапуски вытесняли бы ротацией всю историю.
+        """
+        backups = list_backups(self.backup_dir)
+        if not backups:
+            return 0.0
+        age = time.time() - backup_time(backups[-1])
+        # копия «из будущего» (переводили часы) — ждём обычный интервал
+        return min(self.interval, max(0.0, self.interval - age))
+
+    # -----------------------
+    # Фоновый поток
+    # -----------------------
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="db-backup", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        if self._stop.wait(self.initial_delay()):
+            return
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                if self.logger and not self._stop.is_set():
+                    self.logger.error(f"Ошибка резервного копирования: {e}")
+            if self._stop.wait(self.interval):
+                break
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.backup", description="Резервные копии БД рецептов")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("backup", help="снять копию в каталог")
+    p.add_argument("backup_dir")
+    p.add_argument("--db", default="recipes.db")
+    p.add_argument("--keep", type=int, default=DEFAULT_KEEP)
+    p = sub.add_parser("list", help="показать копии в каталоге")
+    p.add_argument("backup_dir")
+    p = sub.add_parser("verify", help="проверить копию (PRAGMA integrity_check)")
+    p.add_argument("backup_path")
+    p = sub.add_parser("restore", help="восстановить БД из копии")
+    p.add_argument("backup_path")
+    p.add_argument("--db", default="recipes.db")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "backup":
+            db = RecipeDB(args.db)
+            try:
+                report = BackupScheduler(db, args.backup_dir, keep=args.keep).run_once(force=True)
+            finally:
+                db.close()
+            print(f"Копия снята: {report}")
+        elif args.command == "list":
+            for path in list_backups(args.backup_dir):
+                print(f"{path}  {os.path.getsize(path) / 1024:.1f} КБ")
+        elif args.command == "verify":
+            problems = integrity_check(args.backup_path)
+            if problems:
+                raise BackupError("; ".join(problems[:5]))
+            print(f"{args.backup_path}: ok")
+        else:
+            saved = restore(args.backup_path, args.db)
+            print(f"БД {args.db} восстановлена из {args.backup_path}"
+                  + (f" (прежняя версия: {saved})" if saved else ""))
+    except RecipeError as e:
+        parser.exit(1, f"Ошибка: {e}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# app/changes.py
+"""
+Журнал изменений (change feed) внутри процесса.
+Контроллер публикует сюда события insert/update/delete с монотонно
+растущими номерами, а клиенты (SSE в веб-версии, таблица в GUI)
+догоняют состояние небольшими патчами вместо полной перезагрузки.
+"""
+
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional
+
+from .models import Recipe
+
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    seq: int
+    op: str                          # INSERT / UPDATE / DELETE
+    recipe_id: int
+    recipe: Optional[Recipe] = None  # состояние после изменения; для DELETE — None
+    previous: Optional[Recipe] = None  # состояние до изменения (UPDATE, DELETE); клиентам не отправляется
+
+    def to_dict(self) -> Dict:
+        return {
+            "seq": self.seq,
+            "op": self.op,
+            "id": self.recipe_id,
+            "recipe": self.recipe.to_dict() if self.recipe else None,
+        }
+
+
+class ChangeLog:
+    """
+    Ограниченный по размеру журнал последних событий.
+    Клиент, отставший больше чем на maxlen событий, должен перечитать данные целиком.
+    """
+
+    def __init__(self, maxlen: int = 1000):
+        self._events: Deque[ChangeEvent] = deque(maxlen=maxlen)
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._subscribers: List[Callable[[ChangeEvent], None]] = []
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def publish(self, op: str, recipe_id: int, recipe: Optional[Recipe] = None,
+                previous: Optional[Recipe] = None) -> ChangeEvent:
+        with self._lock:
+            self._seq += 1
+            event = ChangeEvent(seq=self._seq, op=op, recipe_id=recipe_id, recipe=recipe, previous=previous)
+            self._events.append(event)
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            # сломанный подписчик не должен ломать запись
+            try:
+                callback(event)
+            except Exception:
+                logging.getLogger(__name__).exception("Ошибка подписчика журнала изменений")
+        return event
+
+    def since(self, seq: int) -> Optional[List[ChangeEvent]]:
+        """
+        События с номером > seq по порядку.
+        None — нужные события уже вытеснены из журнала или seq из будущего (клиент
+        помнит номер из прежнего процесса, журнал после перезапуска начат заново):
+        клиенту нужна полная перезагрузка.
+        """
+        with self._lock:
+            if seq > self._seq:
+                return None
+            if seq == self._seq:
+                return []
+            if not self._events or self._events[0].seq > seq + 1:
+                return None
+            skip = seq + 1 - self._events[0].seq
+            return [self._events[i] for i in range(skip, len(self._events))]
+
+    def subscribe(self, callback: Callable[[ChangeEvent], None]) -> Callable[[], None]:
+        """Вызывает callback после каждой публикации (в потоке писателя). Возвращает функцию отписки."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
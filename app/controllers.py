@@ -3,35 +3,143 @@
 Контроллер, реализующий бизнес-логику:
 - добавление / удаление / редактирование рецепта
 - генерация случайного рецепта
-- статистика активностид
+- статистика активности
+- журнал изменений (см. changes.py)
+- отсев почти одинаковых рецептов (см. dedup.py)
+- автодополнение тегов (см. tags.py)
 """
 
 import random
 import datetime
-from typing import List, Dict, Optional
+import threading
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Dict, Optional, Sequence, Tuple, Union
 
-from .models import Recipe, RecipeDB, RecipeError, RecipeNotFoundError
+from .models import Recipe, RecipeStore, RecipeError, RecipeNotFoundError, DuplicateRecipeError
+from .changes import ChangeLog, INSERT, UPDATE, DELETE
+from .dedup import DuplicateIndex
+from .tags import TagIndex, DEFAULT_LIMIT
+
+
+@dataclass
+class ImportReport:
+    added: List[int] = field(default_factory=list)
+    skipped: List[Tuple[Recipe, int]] = field(default_factory=list)  # (рецепт, id найденного дубликата)
 
 
 class RecipeController:
-    def __init__(self, db: RecipeDB, logger=None):
+    def __init__(self, db: RecipeStore, logger=None, changes: Optional[ChangeLog] = None,
+                 dedup: Optional[DuplicateIndex] = None):
         self.db = db
         self.logger = logger
+        # журнал изменений для инкрементального обновления клиентов
+        self.changes = changes if changes is not None else ChangeLog()
+        # индекс дубликатов заполняется из БД при первом обращении или заранее (preload)
+        self.dedup = dedup
+        self._dedup_loaded = False
+        self._dedup_lock = threading.RLock()
+        self._analytics = None
+        self._tags: Optional[TagIndex] = None
+        self._tags_lock = threading.Lock()
+
+    def _dedup_index(self) -> Optional[DuplicateIndex]:
+        if self.dedup is not None and not self._dedup_loaded:
+            with self._dedup_lock:
+                if not self._dedup_loaded:
+                    self.dedup.load(self.db.iter_all())
+                    self._dedup_loaded = True
+        return self.dedup
+
+    def preload(self) -> Optional[threading.Thread]:
+        """
+        Заполняет индекс дубликатов в фоновом потоке, чтобы первое добавление
+        не ждало чтения всего каталога. Правки, пришедшие во время загрузки,
+        ждут её окончания на _dedup_lock. None — индекса нет или он уже готов.
+        """
+        if self.dedup is None or self._dedup_loaded:
+            return None
+        return self._in_background("dedup-preload", self._dedup_index, "индекс дубликатов")
+
+    def preload_tags(self) -> Optional[threading.Thread]:
+        """
+        Строит словарь тегов в фоновом потоке (чтение столбца tags всего каталога).
+        Подсказки, запрошенные до конца загрузки, ждут её на _tags_lock.
+        None — словарь уже готов.
+        """
+        if self._tags is not None:
+            return None
+        return self._in_background("tags-preload", lambda: self.tags, "словарь тегов")
+
+    def _in_background(self, name: str, work, what: str) -> threading.Thread:
+        def run():
+            try:
+                work()
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"Не удалось построить {what}: {e}")
+
+        thread = threading.Thread(target=run, name=name, daemon=True)
+        thread.start()
+        return thread
+
+    @property
+    def analytics(self):
+        """ActivityAnalytics поверх self.db (любой RecipeStore); NumPy загружается при первом обращении."""
+        if self._analytics is None:
+            from .analytics import ActivityAnalytics
+            self._analytics = ActivityAnalytics(self.db)
+        return self._analytics
+
+    @property
+    def tags(self) -> TagIndex:
+        """Словарь тегов: строится из БД при первом обращении, дальше живёт на событиях self.changes."""
+        if self._tags is None:
+            with self._tags_lock:
+                if self._tags is None:
+                    # подписка до чтения: записи во время загрузки TagIndex.load учтёт сам
+                    index = TagIndex(self.changes)
+                    index.load(self.db.iter_all(("id", "tags")))
+                    self._tags = index
+        return self._tags
+
+    def suggest_tags(self, prefix: str, limit: Optional[int] = DEFAULT_LIMIT) -> List[Tuple[str, int]]:
+        return self.tags.complete(prefix, limit)
 
     def add_recipe(self, title: str, ingredients: str, steps: str, tags: str) -> int:
         title = (title or "").strip()
         if not title:
             raise RecipeError("Название не может быть пустым")
-        created_at = Recipe.now_iso()
-        recipe = Recipe(id=None, title=title, ingredients=ingredients or "", steps=steps or "", tags=tags or "", created_at=created_at)
-        rid = self.db.add(recipe)
+        # проверка и вставка под одной блокировкой: два одинаковых запроса подряд не проходят оба
+        with self._dedup_lock:
+            index = self._dedup_index()
+            if index is not None:
+                matches = index.query(title, ingredients or "")
+                if matches:
+                    dup_id = matches[0][0]
+                    if self.logger:
+                        self.logger.warning(f"Отклонён дубликат рецепта id={dup_id} title='{title}'")
+                    raise DuplicateRecipeError(f"Похожий рецепт уже есть (id={dup_id})", duplicate_of=dup_id)
+            created_at = Recipe.now()
+            recipe = Recipe(id=None, title=title, ingredients=ingredients or "", steps=steps or "", tags=tags or "", created_at=created_at)
+            rid = self.db.add(recipe)
+            recipe.id = rid
+            if index is not None:
+                index.add(rid, recipe.title, recipe.ingredients)
+        self.changes.publish(INSERT, rid, recipe)
         if self.logger:
             self.logger.info(f"Добавлен рецепт id={rid} title='{title}'")
         return rid
 
     def edit_recipe(self, recipe_id: int, title: str, ingredients: str, steps: str, tags: str) -> None:
         try:
+            previous = self.db.get(recipe_id)
             self.db.update(recipe_id, title, ingredients, steps, tags)
+            updated = self.db.get(recipe_id)
+            if self.dedup is not None:
+                with self._dedup_lock:
+                    if self._dedup_loaded:
+                        self.dedup.add(recipe_id, updated.title, updated.ingredients)
+            self.changes.publish(UPDATE, recipe_id, updated, previous=previous)
             if self.logger:
                 self.logger.info(f"Обновлён рецепт id={recipe_id}")
         except RecipeNotFoundError:
@@ -41,7 +149,12 @@ class RecipeController:
 
     def delete_recipe(self, recipe_id: int) -> None:
         try:
+            previous = self.db.get(recipe_id)
             self.db.delete(recipe_id)
+            if self.dedup is not None:
+                with self._dedup_lock:
+                    self.dedup.remove(recipe_id)
+            self.changes.publish(DELETE, recipe_id, previous=previous)
             if self.logger:
                 self.logger.info(f"Удалён рецепт id={recipe_id}")
         except RecipeNotFoundError:
@@ -49,20 +162,96 @@ class RecipeController:
                 self.logger.warning(f"Попытка удалить несуществующий рецепт id={recipe_id}")
             raise
 
+    def restore_recipe(self, recipe_id: int) -> None:
+        """Отменяет удаление, пока рецепт не вычищен обслуживанием БД."""
+        try:
+            self.db.restore(recipe_id)
+        except RecipeNotFoundError:
+            if self.logger:
+                self.logger.warning(f"Попытка восстановить несуществующий рецепт id={recipe_id}")
+            raise
+        recipe = self.db.get(recipe_id)
+        if self.dedup is not None:
+            with self._dedup_lock:
+                if self._dedup_loaded:
+                    self.dedup.add(recipe_id, recipe.title, recipe.ingredients)
+        self.changes.publish(INSERT, recipe_id, recipe)
+        if self.logger:
+            self.logger.info(f"Восстановлен рецепт id={recipe_id}")
+
+    def import_recipes(self, recipes: Iterable[Recipe]) -> ImportReport:
+        """
+        Пакетный импорт одной транзакцией. Дубликаты уже сохранённых рецептов
+        и повторы внутри пакета пропускаются (если задан индекс дубликатов).
+        """
+        report = ImportReport()
+        accepted: List[Recipe] = []
+        pending: List[int] = []  # временные отрицательные id рецептов пакета в индексе
+        with self._dedup_lock:
+            index = self._dedup_index()
+            try:
+                for recipe in recipes:
+                    if index is not None:
+                        matches = index.query(recipe.title, recipe.ingredients)
+                        if matches:
+                            report.skipped.append((recipe, matches[0][0]))
+                            continue
+                        pending.append(-(len(accepted) + 1))
+                        index.add(pending[-1], recipe.title, recipe.ingredients)
+                    accepted.append(recipe)
+                ids = self.db.add_many(accepted)
+            finally:
+                for tmp in pending:
+                    index.remove(tmp)
+            for recipe, rid in zip(accepted, ids):
+                recipe.id = rid
+                if index is not None:
+                    index.add(rid, recipe.title, recipe.ingredients)
+
+        for recipe, rid in zip(accepted, ids):
+            self.changes.publish(INSERT, rid, recipe)
+        # повтор внутри пакета ссылается на временный id -> заменяем на настоящий
+        report.skipped = [(r, ids[-dup - 1] if dup < 0 else dup) for r, dup in report.skipped]
+        report.added = ids
+        if self.logger:
+            self.logger.info(f"Импортировано рецептов: {len(ids)}, пропущено дубликатов: {len(report.skipped)}")
+        return report
+
+    def find_duplicates(self) -> List[List[int]]:
+        """Группы id почти одинаковых рецептов во всём каталоге."""
+        index = self._dedup_index()
+        if index is None:
+            index = DuplicateIndex()
+            index.load(self.db.iter_all())
+        return index.find_duplicates()
+
     def list_recipes(self, limit: Optional[int] = None) -> List[Recipe]:
         return self.db.list_all(limit=limit)
 
+    def iter_all(self, columns: Optional[Sequence[str]] = None) -> Iterator[Union[Recipe, tuple]]:
+        """Все рецепты по одному, без списка в памяти; columns — см. RecipeDB.iter_all."""
+        return self.db.iter_all(columns)
+
+    def iter_by_tag(self, tag: str, columns: Optional[Sequence[str]] = None) -> Iterator[Union[Recipe, tuple]]:
+        return self.db.iter_by_tag(tag, columns)
+
+    def list_between(self, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None,
+                     limit: Optional[int] = None) -> List[Recipe]:
+        return self.db.list_between(start, end, limit=limit)
+
     def get_recipe(self, recipe_id: int) -> Recipe:
         return self.db.get(recipe_id)
 
     def random_recipe(self, tag_filter: Optional[str] = None) -> Recipe:
-        if tag_filter:
-            candidates = self.db.find_by_tag(tag_filter)
-        else:
-            candidates = self.db.list_all()
-        if not candidates:
+        # выборка с резервуаром за один проход по id: каталог в память не загружается
+        ids = self.db.iter_by_tag(tag_filter, ("id",)) if tag_filter else self.db.iter_all(("id",))
+        chosen = None
+        for n, (rid,) in enumerate(ids, 1):
+            if random.randrange(n) == 0:
+                chosen = rid
+        if chosen is None:
             raise RecipeError("Нет подходящих рецептов для генерации")
-        choice = random.choice(candidates)
+        choice = self.db.get(chosen)
         if self.logger:
             self.logger.info(f"Сгенерирован случайный рецепт id={choice.id} title='{choice.title}'")
         return choice
@@ -70,3 +259,8 @@ class RecipeController:
     def activity_stats(self) -> Dict[str, int]:
         # возвращает {date_str: count}
         return self.db.count_by_date()
+
+    def activity_by_day(self, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None,
+                        limit: Optional[int] = None) -> Dict[datetime.date, int]:
+        # возвращает {datetime.date: count} по возрастанию даты
+        return self.db.count_by_day(start, end, limit=limit)
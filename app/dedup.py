@@ -0,0 +1,222 @@
+# app/dedup.py
+"""
+Поиск почти одинаковых рецептов: MinHash-сигнатуры + LSH-корзины.
+
+Рецепт превращается в множество признаков: слова названия и ингредиенты,
+нормализованные (регистр, пробелы, пунктуация), поэтому копии, отличающиеся
+пробелами или порядком ингредиентов, дают одинаковое множество.
+Сходство Жаккара оценивается по сигнатуре из NUM_PERM минимумов, а кандидаты
+находятся через BANDS корзин — без попарного сравнения всех рецептов.
+
+Хэш-функции сигнатуры — multiply-shift по модулю 2^64: одно и то же значение
+считается поштучно в Python (add, query) и пачкой в NumPy (load), где
+переполнение uint64 и есть взятие по модулю.
+"""
+
+import hashlib
+import operator
+import random
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .models import Recipe
+
+NUM_PERM = 64
+LOAD_CHUNK = 4096    # рецептов в одной пачке векторизованной загрузки
+BANDS = 8            # 8 полос по 8 значений: кандидатами становятся пары с J >~ 0.77
+THRESHOLD = 0.8      # минимальное оценённое сходство, чтобы считать рецепты дубликатами
+
+_MASK = (1 << 64) - 1
+_WORDS = re.compile(r"\w+")
+_ITEM_SEP = re.compile(r"[,;\n]+")
+
+Signature = Tuple[int, ...]
+
+
+def features(title: str, ingredients: str) -> Set[str]:
+    """
+    Нормализованные признаки рецепта: слова названия и ингредиенты (без учёта порядка).
+    Без ингредиентов признаков нет: по одному названию («Чай») дубликат не определить,
+    такие рецепты не проверяются и в индекс не попадают.
+    """
+    items = {"i:" + item for item in (" ".join(_WORDS.findall(part.lower()))
+                                      for part in _ITEM_SEP.split(ingredients or "")) if item}
+    if not items:
+        return set()
+    return items | {"t:" + w for w in _WORDS.findall((title or "").lower())}
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class DuplicateIndex:
+    def __init__(self, threshold: float = THRESHOLD, num_perm: int = NUM_PERM, bands: int = BANDS, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm должно делиться на bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rnd = random.Random(seed)
+        # a нечётное: h -> a*h mod 2^64 взаимно однозначно; в сигнатуру идут старшие 32 бита
+        self._perms = [(rnd.getrandbits(64) | 1, rnd.getrandbits(64)) for _ in range(num_perm)]
+        # ключ корзины — хэш полосы сигнатуры (свои множители у каждой полосы);
+        # случайное совпадение ключей даёт лишь лишнего кандидата, его отсеет similarity
+        self._band_mults = [[rnd.getrandbits(64) | 1 for _ in range(self.rows)] for _ in range(bands)]
+        self._signatures: Dict[int, Signature] = {}
+        self._keys: Dict[int, List[int]] = {}
+        self._buckets: Dict[int, Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, recipe_id: int) -> bool:
+        return recipe_id in self._signatures
+
+    def signature(self, title: str, ingredients: str) -> Signature:
+        hashes = [_feature_hash(f) for f in features(title, ingredients)]
+        if not hashes:
+            return ()
+        return tuple(min(((a * h + b) & _MASK) >> 32 for h in hashes) for a, b in self._perms)
+
+    def _band_keys(self, sig: Signature) -> List[int]:
+        rows = self.rows
+        return [sum(map(operator.mul, sig[band * rows:(band + 1) * rows], mults)) & _MASK
+                for band, mults in enumerate(self._band_mults)]
+
+    @staticmethod
+    def similarity(a: Signature, b: Signature) -> float:
+        """Оценка сходства Жаккара по двум сигнатурам."""
+        if not a or not b:
+            return 0.0
+        return sum(map(operator.eq, a, b)) / len(a)
+
+    # -----------------------
+    # Изменение индекса
+    # -----------------------
+    def add(self, recipe_id: int, title: str, ingredients: str) -> None:
+        """Добавляет или заменяет сигнатуру рецепта."""
+        self._put(recipe_id, self.signature(title, ingredients))
+
+    def _put(self, recipe_id: int, sig: Signature, keys: Optional[List[int]] = None) -> None:
+        if recipe_id in self._signatures:
+            self.remove(recipe_id)
+        if not sig:
+            return
+        if keys is None:
+            keys = self._band_keys(sig)
+        self._signatures[recipe_id] = sig
+        self._keys[recipe_id] = keys
+        buckets = self._buckets
+        for key in keys:
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = {recipe_id}
+            else:
+                bucket.add(recipe_id)
+
+    def remove(self, recipe_id: int) -> None:
+        if self._signatures.pop(recipe_id, None) is None:
+            return
+        for key in self._keys.pop(recipe_id):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(recipe_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def load(self, recipes: Iterable[Recipe], chunk: int = LOAD_CHUNK) -> None:
+        """
+        Массовая загрузка: сигнатуры пачки считаются матрицей NumPy
+        (перестановки x признаки), минимумы по рецептам — reduceat.
+        Хэши повторяющихся признаков («мука», «яйца») кэшируются.
+        """
+        import numpy as np
+
+        a = np.array([p[0] for p in self._perms], dtype=np.uint64)[:, None]
+        b = np.array([p[1] for p in self._perms], dtype=np.uint64)[:, None]
+        shift = np.uint64(32)
+        mults = np.array(self._band_mults, dtype=np.uint64)[:, :, None]
+        cache: Dict[str, int] = {}
+
+        def flush(ids: List[int], starts: List[int], hashes: List[int]) -> None:
+            h = np.array(hashes, dtype=np.uint64)
+            with np.errstate(over="ignore"):
+                values = (a * h + b) >> shift
+                mins = np.minimum.reduceat(values, starts, axis=1)
+                # те же ключи корзин, что и _band_keys: сумма произведений по модулю 2^64
+                keys = (mins.reshape(self.bands, self.rows, -1) * mults).sum(axis=1, dtype=np.uint64)
+            for rid, sig, key in zip(ids, mins.T.tolist(), keys.T.tolist()):
+                self._put(rid, tuple(sig), key)
+
+        ids: List[int] = []
+        starts: List[int] = []
+        hashes: List[int] = []
+        for recipe in recipes:
+            feats = features(recipe.title, recipe.ingredients)
+            if not feats:
+                self.remove(recipe.id)
+                continue
+            ids.append(recipe.id)
+            starts.append(len(hashes))
+            for f in feats:
+                h = cache.get(f)
+                if h is None:
+                    h = cache[f] = _feature_hash(f)
+                hashes.append(h)
+            if len(ids) >= chunk:
+                flush(ids, starts, hashes)
+                ids, starts, hashes = [], [], []
+        if ids:
+            flush(ids, starts, hashes)
+
+    # -----------------------
+    # Поиск
+    # -----------------------
+    def query(self, title: str, ingredients: str, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Похожие рецепты [(id, сходство)] по убыванию сходства; exclude — id самого рецепта."""
+        return self._matches(self.signature(title, ingredients), exclude)
+
+    def _matches(self, sig: Signature, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        if not sig:
+            return []
+        candidates = set()
+        for key in self._band_keys(sig):
+            candidates |= self._buckets.get(key, set())
+        candidates.discard(exclude)
+        scored = ((rid, self.similarity(sig, self._signatures[rid])) for rid in candidates)
+        return sorted(((rid, s) for rid, s in scored if s >= self.threshold), key=lambda m: (-m[1], m[0]))
+
+    def find_duplicates(self) -> List[List[int]]:
+        """Группы дубликатов (id по возрастанию); сравниваются только пары из общих корзин."""
+        parent: Dict[int, int] = {}
+
+        def find(x):
+            while parent.get(x, x) != x:
+                parent[x] = parent.get(parent[x], parent[x])
+                x = parent[x]
+            return x
+
+        checked = set()
+        for bucket in self._buckets.values():
+            if len(bucket) < 2:
+                continue
+            ids = sorted(bucket)
+            for i, a in enumerate(ids):
+                for b in ids[i + 1:]:
+                    if (a, b) in checked:
+                        continue
+                    checked.add((a, b))
+                    if self.similarity(self._signatures[a], self._signatures[b]) >= self.threshold:
+                        ra, rb = find(a), find(b)
+                        if ra != rb:
+                            parent[max(ra, rb)] = min(ra, rb)
+
+        groups: Dict[int, List[int]] = {}
+        for rid in parent:
+            groups.setdefault(find(rid), []).append(rid)
+        for root, members in groups.items():
+            if root not in members:
+                members.append(root)
+        return sorted(sorted(g) for g in groups.values())
@@ -2,26 +2,29 @@
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QTabWidget,
     QPushButton, QTableWidget, QTableWidgetItem, QTextEdit,
     QLineEdit, QLabel, QMessageBox, QFormLayout, QTextBrowser,
-    QStatusBar, QDialog
+    QStatusBar, QDialog, QCompleter
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer, QStringListModel, Signal
 from PySide6.QtGui import QFont
 import logging
-import datetime as dt
-import numpy as np
-
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-import matplotlib.dates as mdates
 
+# matplotlib импортируется лениво (см. _ensure_chart): окно показывается до загрузки графиков
 from .models import Recipe
+from .changes import DELETE
 from .logger_config import QTextEditHandler
 
+# Сколько секунд после удаления доступна кнопка «Отменить»
+UNDO_SECONDS = 10
+
 
 class ModernMainWindow(QMainWindow):
+    # окно впервые отрисовано; отложенная работа (_deferred_init) запускается после этого
+    first_painted = Signal()
+
     def __init__(self, controller, logger=None):
         super().__init__()
         self.controller = controller
+        self._painted = False
         self.logger = logger or logging.getLogger(__name__)
         self.setWindowTitle("Генератор рецептов")
         self.resize(950, 650)
@@ -65,6 +68,19 @@ class ModernMainWindow(QMainWindow):
         self._connect_handlers()
         self.refresh_table()
 
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._painted:
+            self._painted = True
+            self.first_painted.emit()
+            # тяжёлое планируется только из первой отрисовки: окно уже на экране
+            QTimer.singleShot(0, self._deferred_init)
+
+    def _deferred_init(self):
+        # график (импорт matplotlib) — не на первом нажатии клавиши; словарь тегов — в фоне
+        self._ensure_chart()
+        self.controller.preload_tags()
+
     def _build_ui(self):
         central = QWidget()
         layout = QVBoxLayout()
@@ -91,6 +107,15 @@ class ModernMainWindow(QMainWindow):
         self.setCentralWidget(central)
         self.setStatusBar(QStatusBar())
 
+        # Отмена удаления: кнопка в статусной строке, скрывается по таймеру
+        self._undo_id = None
+        self.btn_undo = QPushButton("Отменить удаление")
+        self.btn_undo.hide()
+        self.statusBar().addPermanentWidget(self.btn_undo)
+        self._undo_timer = QTimer(self)
+        self._undo_timer.setSingleShot(True)
+        self._undo_timer.timeout.connect(self._hide_undo)
+
     # -----------------------------
     # Таблица + график активности
     # -----------------------------
@@ -104,11 +129,12 @@ class ModernMainWindow(QMainWindow):
         self.table.setColumnWidth(1, 280)
         layout.addWidget(self.table)
 
-        # График активности
-        self.figure = Figure(figsize=(5, 2))
-        self.canvas = FigureCanvas(self.figure)
+        # График активности (холст создаётся в _ensure_chart)
+        self.figure = None
+        self.canvas = None
+        self.chart_layout = QVBoxLayout()
         layout.addWidget(QLabel("Активность добавления рецептов"))
-        layout.addWidget(self.canvas)
+        layout.addLayout(self.chart_layout)
         
         # Кнопки
         btn_layout = QHBoxLayout()
@@ -160,6 +186,10 @@ class ModernMainWindow(QMainWindow):
 
         self.input_filter_tags = QLineEdit()
         self.input_filter_tags.setPlaceholderText("Введите тег (например, 'десерт')")
+        # подсказки приходят уже отобранными из словаря тегов — completer их не фильтрует
+        self.tag_completer = QCompleter(QStringListModel(self), self)
+        self.tag_completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.input_filter_tags.setCompleter(self.tag_completer)
         self.btn_random = QPushButton("Случайный рецепт")
         self.random_recipe_display = QTextBrowser()
 
@@ -181,6 +211,8 @@ class ModernMainWindow(QMainWindow):
         self.btn_view.clicked.connect(self.on_view)
         self.btn_edit.clicked.connect(self.on_edit)
         self.btn_delete.clicked.connect(self.on_delete)
+        self.btn_undo.clicked.connect(self.on_undo_delete)
+        self.input_filter_tags.textEdited.connect(self.on_filter_tags_edited)
 
         qhandler = QTextEditHandler(self.log_widget.append)
         self.logger.handlers.clear()
@@ -192,20 +224,77 @@ class ModernMainWindow(QMainWindow):
     # -----------------------------
     def refresh_table(self):
         try:
+            # номер события до чтения: всё, что позже, догонит apply_changes
+            self._seq = self.controller.changes.last_seq
             recipes = self.controller.list_recipes()
             self.table.setRowCount(len(recipes))
             for i, recipe in enumerate(recipes):
-                self.table.setItem(i, 0, QTableWidgetItem(str(recipe.id)))
-                self.table.setItem(i, 1, QTableWidgetItem(recipe.title))
-                self.table.setItem(i, 2, QTableWidgetItem(recipe.tags))
-                self.table.setItem(i, 3, QTableWidgetItem(recipe.created_at))
+                self._fill_row(i, recipe)
             self._update_chart()
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить рецепты:\n{e}")
 
+    def apply_changes(self):
+        """Патчит таблицу событиями журнала изменений вместо полной перезагрузки."""
+        events = self.controller.changes.since(self._seq)
+        if events is None:
+            self.refresh_table()
+            return
+        for event in events:
+            row = self._find_row(event.recipe_id)
+            if event.op == DELETE:
+                if row is not None:
+                    self.table.removeRow(row)
+            elif row is None:
+                # таблица отсортирована по убыванию даты; новые рецепты обычно встают в начало
+                row = self._insert_position(event.recipe)
+                self.table.insertRow(row)
+                self._fill_row(row, event.recipe)
+            else:
+                self._fill_row(row, event.recipe)
+            self._seq = event.seq
+        if events:
+            self._update_chart()
+
+    def _fill_row(self, row, recipe):
+        self.table.setItem(row, 0, QTableWidgetItem(str(recipe.id)))
+        self.table.setItem(row, 1, QTableWidgetItem(recipe.title))
+        self.table.setItem(row, 2, QTableWidgetItem(recipe.tags))
+        self.table.setItem(row, 3, QTableWidgetItem(recipe.created_at.isoformat(sep=" ")))
+
+    def _insert_position(self, recipe):
+        created = recipe.created_at.isoformat(sep=" ")
+        for row in range(self.table.rowCount()):
+            if self.table.item(row, 3).text() <= created:
+                return row
+        return self.table.rowCount()
+
+    def _find_row(self, recipe_id):
+        for item in self.table.findItems(str(recipe_id), Qt.MatchExactly):
+            if item.column() == 0:
+                return item.row()
+        return None
+
+    def _ensure_chart(self):
+        if self.canvas is not None:
+            return
+        from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+
+        self.figure = Figure(figsize=(5, 2))
+        self.canvas = FigureCanvas(self.figure)
+        self.chart_layout.addWidget(self.canvas)
+        self._update_chart()
+
     def _update_chart(self):
+        if self.canvas is None:
+            # ещё не построен — _ensure_chart нарисует актуальные данные
+            return
+        import matplotlib.dates as mdates
+
         try:
-            stats = self.controller.activity_stats()
+            # Последние 30 дней с добавлениями, уже отсортированные по дате
+            stats = self.controller.activity_by_day(limit=30)
             self.figure.clear()
             ax = self.figure.add_subplot(111)
 
@@ -215,62 +304,33 @@ class ModernMainWindow(QMainWindow):
                 ax.set_xticks([])
                 ax.set_yticks([])
             else:
-                # Фильтруем и сортируем данные
-                valid_data = {}
-                for date_str, count in stats.items():
-                    if count > 0:  # Показываем только даты с рецептами
-                        try:
-                            # Преобразуем строку в дату
-                            if 'T' in date_str:
-                                date_obj = dt.datetime.fromisoformat(date_str).date()
-                            else:
-                                date_obj = dt.datetime.strptime(date_str, '%Y-%m-%d').date()
-                            valid_data[date_obj] = count
-                        except (ValueError, TypeError) as e:
-                            self.logger.warning(f"Пропущена некорректная дата: {date_str}, ошибка: {e}")
-                            continue
-
-                if not valid_data:
-                    ax.text(0.5, 0.5, "Нет данных для отображения",
-                            ha="center", va="center", fontsize=11, color="gray")
-                    ax.set_xticks([])
-                    ax.set_yticks([])
-                else:
-                    # Сортируем по дате
-                    dates = sorted(valid_data.keys())
-                    counts = [valid_data[d] for d in dates]
-
-                    # Ограничиваем количество отображаемых точек (последние 30 дней)
-                    if len(dates) > 30:
-                        dates = dates[-30:]
-                        counts = counts[-30:]
-
-                    y = np.array(counts, dtype=int)
-
-                    # Столбчатая диаграмма
-                    bars = ax.bar(dates, y, color="#64b5f6", edgecolor="#1976d2", alpha=0.85, width=0.8)
-
-                    # Добавляем подписи над столбцами
-                    for bar in bars:
-                        height = bar.get_height()
-                        if height > 0:
-                            ax.text(bar.get_x() + bar.get_width()/2, height + 0.1,
-                                    str(int(height)), ha='center', va='bottom', fontsize=9)
-
-                    # Стиль графика (без эмодзи)
-                    ax.set_title("Активность добавления рецептов", fontsize=12, pad=10, fontweight="bold")
-                    ax.set_ylabel("Количество рецептов", fontsize=10)
-                    ax.set_xlabel("Дата добавления", fontsize=10)
-                    ax.grid(axis="y", linestyle="--", alpha=0.5)
-
-                    # Форматирование дат
-                    ax.xaxis.set_major_formatter(mdates.DateFormatter("%d.%m"))
-                    
-                    # Настройка осей
-                    ax.set_ylim(bottom=0, top=max(y) * 1.2 if max(y) > 0 else 5)
-                    
-                    # Автоматическое форматирование дат
-                    self.figure.autofmt_xdate(rotation=45)
+                dates = list(stats.keys())
+                y = list(stats.values())
+
+                # Столбчатая диаграмма
+                bars = ax.bar(dates, y, color="#64b5f6", edgecolor="#1976d2", alpha=0.85, width=0.8)
+
+                # Добавляем подписи над столбцами
+                for bar in bars:
+                    height = bar.get_height()
+                    if height > 0:
+                        ax.text(bar.get_x() + bar.get_width()/2, height + 0.1,
+                                str(int(height)), ha='center', va='bottom', fontsize=9)
+
+                # Стиль графика (без эмодзи)
+                ax.set_title("Активность добавления рецептов", fontsize=12, pad=10, fontweight="bold")
+                ax.set_ylabel("Количество рецептов", fontsize=10)
+                ax.set_xlabel("Дата добавления", fontsize=10)
+                ax.grid(axis="y", linestyle="--", alpha=0.5)
+
+                # Форматирование дат
+                ax.xaxis.set_major_formatter(mdates.DateFormatter("%d.%m"))
+                
+                # Настройка осей
+                ax.set_ylim(bottom=0, top=max(y) * 1.2 if max(y) > 0 else 5)
+                
+                # Автоматическое форматирование дат
+                self.figure.autofmt_xdate(rotation=45)
 
             self.figure.tight_layout()
             self.canvas.draw()
@@ -299,7 +359,7 @@ class ModernMainWindow(QMainWindow):
         try:
             self.controller.add_recipe(title, ing, steps, tags)
             self.logger.info(f"Добавлен рецепт: {title}")
-            self.refresh_table()
+            self.apply_changes()
             QMessageBox.information(self, "Успех", "Рецепт успешно добавлен!")
             self.on_clear()
         except Exception as e:
@@ -329,7 +389,34 @@ class ModernMainWindow(QMainWindow):
                                      QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
             self.controller.delete_recipe(recipe.id)
-            self.refresh_table()
+            self.apply_changes()
+            self._undo_id = recipe.id
+            self.statusBar().showMessage(f"Рецепт '{recipe.title}' удалён", UNDO_SECONDS * 1000)
+            self.btn_undo.show()
+            self._undo_timer.start(UNDO_SECONDS * 1000)
+
+    def on_undo_delete(self):
+        rid, self._undo_id = self._undo_id, None
+        self._hide_undo()
+        if rid is None:
+            return
+        try:
+            self.controller.restore_recipe(rid)
+            self.apply_changes()
+            self.statusBar().showMessage("Удаление отменено", 3000)
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", str(e))
+
+    def _hide_undo(self):
+        self._undo_timer.stop()
+        self.btn_undo.hide()
+
+    def on_filter_tags_edited(self, text):
+        prefix = text.strip()
+        tags = [tag for tag, _ in self.controller.suggest_tags(prefix)] if prefix else []
+        self.tag_completer.model().setStringList(tags)
+        if tags:
+            self.tag_completer.complete()
 
     def on_random(self):
         tag = self.input_filter_tags.text().strip() or None
@@ -356,7 +443,7 @@ class ModernMainWindow(QMainWindow):
         if dlg.exec() == QDialog.Accepted and editable:
             data = dlg.get_data()
             self.controller.edit_recipe(recipe.id, **data)
-            self.refresh_table()
+            self.apply_changes()
 
 
 class RecipeDialog(QDialog):
@@ -4,7 +4,6 @@
 """
 
 import logging
-from PySide6.QtCore import QObject, Signal
 
 
 class QTextEditHandler(logging.Handler):
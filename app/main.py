@@ -5,11 +5,15 @@
 Запускает QApplication, создаёт DB, контроллер и окно.
 """
 
+import os
 import sys
 import logging
 from PySide6.QtWidgets import QApplication
 from .models import RecipeDB
 from .controllers import RecipeController
+from .dedup import DuplicateIndex
+from .maintenance import MaintenanceScheduler
+from .backup import BackupScheduler
 from .gui import ModernMainWindow
 
 from .logger_config import setup_root_logger, QTextEditHandler
@@ -24,7 +28,7 @@ def run():
     logger = logging.getLogger("recipe_app")
     setup_root_logger(level=logging.INFO)
     # Контроллер
-    controller = RecipeController(db=db, logger=logger)
+    controller = RecipeController(db=db, logger=logger, dedup=DuplicateIndex())
     # Окно
     mw = ModernMainWindow(controller=controller, logger=logger)
 
@@ -32,7 +36,20 @@ def run():
     # Перевыставим handler для записи в виджет (MainWindow создает QTextEdit handler внутри)
     # Показываем окно
     mw.show()
-    sys.exit(app.exec())
+    # индекс дубликатов — в фоне, пока пользователь смотрит на окно
+    controller.preload()
+
+    # Фоновое обслуживание БД в простое (лог — в консоль: QTextEdit нельзя трогать из другого потока)
+    maintenance = MaintenanceScheduler(db.db_path, logger=logging.getLogger("maintenance"))
+    maintenance.start()
+    # резервные копии по расписанию в backups/ рядом с БД
+    backups = BackupScheduler(db, os.path.join(os.path.dirname(os.path.abspath(db.db_path)), "backups"),
+                              logger=logging.getLogger("backup"))
+    backups.start()
+    code = app.exec()
+    backups.stop(timeout=5)
+    maintenance.stop(timeout=5)
+    sys.exit(code)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,123 @@
+# app/maintenance.py
+"""
+Фоновое обслуживание БД:
+- окончательное удаление мягко удалённых рецептов (пачками);
+- PRAGMA incremental_vacuum — возврат освободившихся страниц ОС;
+- PRAGMA optimize / ANALYZE — статистика для планировщика запросов.
+
+Работы запускаются только в простое: планировщик держит своё соединение
+и считает БД простаивающей, пока PRAGMA data_version не меняется
+(её меняют коммиты любых других соединений).
+"""
+
+import datetime
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from .models import Recipe, RecipeDB
+
+
+@dataclass
+class MaintenanceReport:
+    purged: int              # окончательно удалено строк
+    pages_before: int
+    pages_after: int
+    page_size: int
+    duration: float          # секунды
+
+    @property
+    def reclaimed_bytes(self) -> int:
+        return max(0, self.pages_before - self.pages_after) * self.page_size
+
+    def __str__(self) -> str:
+        return (f"удалено строк: {self.purged}, освобождено: {self.reclaimed_bytes / 1024:.1f} КБ "
+                f"за {self.duration:.2f} с")
+
+
+class MaintenanceScheduler:
+    def __init__(self, db_path: str, retention: datetime.timedelta = datetime.timedelta(days=1),
+                 interval: float = 3600.0, idle: float = 30.0, poll: float = 5.0,
+                 batch_size: int = 500, logger=None,
+                 on_report: Optional[Callable[[MaintenanceReport], None]] = None):
+        """
+        retention — сколько хранить мягко удалённые строки (окно для отмены удаления);
+        interval — минимальный промежуток между обслуживаниями;
+        idle — сколько секунд без чужих записей считать простоем.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size должен быть >= 1")
+        self.db_path = db_path
+        self.retention = retention
+        self.interval = interval
+        self.idle = idle
+        self.poll = poll
+        self.batch_size = batch_size
+        self.logger = logger
+        self.on_report = on_report
+        self.last_report: Optional[MaintenanceReport] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self, db: Optional[RecipeDB] = None) -> MaintenanceReport:
+        """Один проход обслуживания (можно вызывать и вручную)."""
+        own = db is None
+        db = db or RecipeDB(self.db_path)
+        try:
+            started = time.perf_counter()
+            before = db.storage_stats()
+            purged = db.purge_deleted(Recipe.now() - self.retention, batch_size=self.batch_size)
+            db.incremental_vacuum()
+            db.optimize(analyze=purged > 0)
+            after = db.storage_stats()
+            report = MaintenanceReport(purged=purged, pages_before=before["page_count"],
+                                       pages_after=after["page_count"], page_size=after["page_size"],
+                                       duration=time.perf_counter() - started)
+        finally:
+            if own:
+                db.close()
+        self.last_report = report
+        if self.logger:
+            self.logger.info(f"Обслуживание БД: {report}")
+        if self.on_report:
+            self.on_report(report)
+        return report
+
+    # -----------------------
+    # Фоновый поток
+    # -----------------------
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="db-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        db = RecipeDB(self.db_path)
+        try:
+            seen = db.conn.execute("PRAGMA data_version").fetchone()[0]
+            quiet_since = time.monotonic()
+            last_run = float("-inf")
+            while not self._stop.wait(self.poll):
+                current = db.conn.execute("PRAGMA data_version").fetchone()[0]
+                now = time.monotonic()
+                if current != seen:
+                    seen, quiet_since = current, now
+                    continue
+                if now - quiet_since >= self.idle and now - last_run >= self.interval:
+                    try:
+                        self.run_once(db)
+                    except Exception as e:
+                        if self.logger:
+                            self.logger.error(f"Ошибка обслуживания БД: {e}")
+                    last_run = time.monotonic()
+        finally:
+            db.close()
@@ -0,0 +1,301 @@
+﻿# app/memory_store.py
+"""
+Хранилища рецептов в памяти (реализации RecipeStore):
+- MemoryRecipeDB — самостоятельный движок на индексах в памяти (тесты, кэш);
+- CachedRecipeDB — «горячий» слой чтения перед RecipeDB: запись сквозная
+  (сначала SQLite, затем память), чтение — только из памяти.
+"""
+
+import bisect
+import dataclasses
+import datetime
+import itertools
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from .models import (
+    EPOCH, Recipe, RecipeDB, RecipeError, RecipeNotFoundError,
+    check_columns, project, split_tags, to_epoch,
+)
+
+
+class MemoryRecipeDB:
+    """
+    Индексы:
+    - _rows: id -> Recipe (живые рецепты), _deleted: id -> (Recipe, deleted_at);
+    - _order: отсортированный список (created_at epoch, id) — сортировка и диапазоны;
+    - _tags: тег -> множество id (posting lists).
+
+    find_by_tag ищет подстроку в нормализованных тегах (без учёта регистра),
+    как LIKE '%tag%' в RecipeDB, но не через границу запятой.
+    """
+
+    def __init__(self):
+        self._rows: Dict[int, Recipe] = {}
+        self._deleted: Dict[int, Tuple[Recipe, int]] = {}
+        self._order: List[Tuple[int, int]] = []
+        self._tags: Dict[str, Set[int]] = {}
+        self._next_id = 1
+        self._writes = 0
+
+    @property
+    def version(self) -> int:
+        return self._writes
+
+    # -----------------------
+    # Индексы
+    # -----------------------
+    def _index(self, recipe: Recipe) -> None:
+        self._rows[recipe.id] = recipe
+        bisect.insort(self._order, (to_epoch(recipe.created_at), recipe.id))
+        for tag in split_tags(recipe.tags):
+            self._tags.setdefault(tag, set()).add(recipe.id)
+
+    def _unindex(self, recipe: Recipe) -> None:
+        del self._rows[recipe.id]
+        key = (to_epoch(recipe.created_at), recipe.id)
+        i = bisect.bisect_left(self._order, key)
+        if i < len(self._order) and self._order[i] == key:
+            del self._order[i]
+        for tag in split_tags(recipe.tags):
+            ids = self._tags.get(tag)
+            if ids is not None:
+                ids.discard(recipe.id)
+                if not ids:
+                    del self._tags[tag]
+
+    def _put(self, recipe: Recipe) -> None:
+        """Вставляет копию рецепта с уже назначенным id (для CachedRecipeDB)."""
+        self._deleted.pop(recipe.id, None)
+        if recipe.id in self._rows:
+            self._unindex(self._rows[recipe.id])
+        self._index(dataclasses.replace(recipe))
+        self._next_id = max(self._next_id, recipe.id + 1)
+
+    def _newest_first(self, keys) -> List[Recipe]:
+        return [dataclasses.replace(self._rows[rid]) for _, rid in keys]
+
+    def _iter_keys(self, keys, columns: Optional[Tuple[str, ...]]) -> Iterator[Union[Recipe, tuple]]:
+        for _, rid in keys:
+            recipe = self._rows.get(rid)
+            if recipe is None:
+                continue  # удалён во время обхода
+            yield dataclasses.replace(recipe) if columns is None else project(recipe, columns)
+
+    # -----------------------
+    # CRUD
+    # -----------------------
+    def add(self, recipe: Recipe) -> int:
+        if not recipe.title or not recipe.title.strip():
+            raise RecipeError("Название рецепта не может быть пустым")
+        rid = self._next_id
+        self._put(dataclasses.replace(recipe, id=rid))
+        self._writes += 1
+        return rid
+
+    def add_many(self, recipes: List[Recipe]) -> List[int]:
+        for recipe in recipes:
+            if not recipe.title or not recipe.title.strip():
+                raise RecipeError("Название рецепта не может быть пустым")
+        return [self.add(recipe) for recipe in recipes]
+
+    def seed(self, recipes: List[Recipe]) -> None:
+        self.add_many(recipes)
+
+    def list_all(self, limit: Optional[int] = None) -> List[Recipe]:
+        keys = reversed(self._order)
+        if limit:
+            keys = itertools.islice(keys, int(limit))
+        return self._newest_first(keys)
+
+    def get(self, recipe_id: int) -> Recipe:
+        recipe = self._rows.get(recipe_id)
+        if recipe is None:
+            raise RecipeNotFoundError(f"Рецепт с id={recipe_id} не найден")
+        return dataclasses.replace(recipe)
+
+    def update(self, recipe_id: int, title: str, ingredients: str, steps: str, tags: str) -> None:
+        recipe = self._rows.get(recipe_id)
+        if recipe is None:
+            raise RecipeNotFoundError(f"Рецепт с id={recipe_id} не найден для обновления")
+        self._put(dataclasses.replace(recipe, title=title, ingredients=ingredients, steps=steps, tags=tags))
+        self._writes += 1
+
+    def delete(self, recipe_id: int) -> None:
+        recipe = self._rows.get(recipe_id)
+        if recipe is None:
+            raise RecipeNotFoundError(f"Рецепт с id={recipe_id} не найден для удаления")
+        self._unindex(recipe)
+        self._deleted[recipe_id] = (recipe, to_epoch(Recipe.now()))
+        self._writes += 1
+
+    def restore(self, recipe_id: int) -> None:
+        if recipe_id not in self._deleted:
+            raise RecipeNotFoundError(f"Удалённый рецепт с id={recipe_id} не найден для восстановления")
+        recipe, _ = self._deleted.pop(recipe_id)
+        self._index(recipe)
+        self._writes += 1
+
+    def purge_deleted(self, older_than: datetime.datetime, batch_size: int = 500) -> int:
+        cutoff = to_epoch(older_than)
+        expired = [rid for rid, (_, deleted_at) in self._deleted.items() if deleted_at < cutoff]
+        for rid in expired:
+            del self._deleted[rid]
+        return len(expired)
+
+    # -----------------------
+    # Поиск и агрегаты
+    # -----------------------
+    def _tag_keys(self, tag: str) -> List[Tuple[int, int]]:
+        needle = tag.strip().lower()
+        ids: Set[int] = set()
+        for name, posting in self._tags.items():
+            if needle in name:
+                ids |= posting
+        return sorted(((to_epoch(self._rows[rid].created_at), rid) for rid in ids), reverse=True)
+
+    def find_by_tag(self, tag: str) -> List[Recipe]:
+        return self._newest_first(self._tag_keys(tag))
+
+    # Обход по копии ключей: записи во время обхода его не ломают
+    def iter_all(self, columns: Optional[Sequence[str]] = None) -> Iterator[Union[Recipe, tuple]]:
+        return self._iter_keys(self._order[::-1], check_columns(columns))
+
+    def iter_by_tag(self, tag: str, columns: Optional[Sequence[str]] = None) -> Iterator[Union[Recipe, tuple]]:
+        return self._iter_keys(self._tag_keys(tag), check_columns(columns))
+
+    def _range(self, start: Optional[datetime.datetime], end: Optional[datetime.datetime]) -> List[Tuple[int, int]]:
+        lo = bisect.bisect_left(self._order, (to_epoch(start),)) if start is not None else 0
+        hi = bisect.bisect_left(self._order, (to_epoch(end),)) if end is not None else len(self._order)
+        return self._order[lo:hi]
+
+    def list_between(self, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None,
+                     limit: Optional[int] = None) -> List[Recipe]:
+        keys = self._range(start, end)[::-1]
+        if limit:
+            keys = keys[:int(limit)]
+        return self._newest_first(keys)
+
+    def count_by_date(self) -> Dict[str, int]:
+        return {day.isoformat(): cnt for day, cnt in self.count_by_day().items()}
+
+    def count_by_day(self, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None,
+                     limit: Optional[int] = None) -> Dict[datetime.date, int]:
+        counts: Dict[int, int] = {}
+        for ts, _ in self._range(start, end):
+            day = ts // 86400
+            counts[day] = counts.get(day, 0) + 1
+        days = sorted(counts)
+        if limit:
+            days = days[-int(limit):]
+        epoch_day = EPOCH.date()
+        return {epoch_day + datetime.timedelta(days=d): counts[d] for d in days}
+
+    def close(self) -> None:
+        pass
+
+
+class CachedRecipeDB:
+    """
+    Кэш всего каталога в памяти перед RecipeDB.
+    Если БД изменило другое соединение (RecipeDB.version сдвинулась не из-за
+    нас), кэш перечитывается целиком при следующем чтении.
+    """
+
+    def __init__(self, backing: RecipeDB):
+        self.backing = backing
+        self.db_path = backing.db_path
+        self._memory = MemoryRecipeDB()
+        self._synced = None
+
+    @property
+    def version(self) -> int:
+        return self.backing.version
+
+    def _fresh(self) -> MemoryRecipeDB:
+        # версия берётся до чтения: чужая запись во время загрузки вызовет ещё одну
+        version = self.backing.version
+        if self._synced != version:
+            memory = MemoryRecipeDB()
+            for recipe in self.backing.iter_all():
+                memory._put(recipe)
+            self._memory = memory
+            self._synced = version
+        return self._memory
+
+    def _written(self, before: int) -> None:
+        # своя запись сдвигает версию ровно на 1 и уже отражена в памяти. Если сдвиг
+        # больше, между _fresh() и записью успело записать другое соединение —
+        # его изменений в памяти нет, кэш перечитается при следующем чтении.
+        self._synced = before + 1 if self.backing.version == before + 1 else None
+
+    # Запись: сначала SQLite, затем память
+    def add(self, recipe: Recipe) -> int:
+        memory = self._fresh()
+        before = self._synced
+        rid = self.backing.add(recipe)
+        memory._put(dataclasses.replace(recipe, id=rid))
+        self._written(before)
+        return rid
+
+    def add_many(self, recipes: List[Recipe]) -> List[int]:
+        memory = self._fresh()
+        before = self._synced
+        ids = self.backing.add_many(recipes)
+        for recipe, rid in zip(recipes, ids):
+            memory._put(dataclasses.replace(recipe, id=rid))
+        self._written(before)
+        return ids
+
+    def seed(self, recipes: List[Recipe]) -> None:
+        self.add_many(recipes)
+
+    def update(self, recipe_id: int, title: str, ingredients: str, steps: str, tags: str) -> None:
+        memory = self._fresh()
+        before = self._synced
+        self.backing.update(recipe_id, title, ingredients, steps, tags)
+        memory.update(recipe_id, title, ingredients, steps, tags)
+        self._written(before)
+
+    def delete(self, recipe_id: int) -> None:
+        memory = self._fresh()
+        before = self._synced
+        self.backing.delete(recipe_id)
+        memory.delete(recipe_id)
+        self._written(before)
+
+    def restore(self, recipe_id: int) -> None:
+        memory = self._fresh()
+        before = self._synced
+        self.backing.restore(recipe_id)
+        memory._put(self.backing.get(recipe_id))
+        self._written(before)
+
+    # Чтение — из памяти
+    def list_all(self, limit: Optional[int] = None) -> List[Recipe]:
+        return self._fresh().list_all(limit)
+
+    def get(self, recipe_id: int) -> Recipe:
+        return self._fresh().get(recipe_id)
+
+    def find_by_tag(self, tag: str) -> List[Recipe]:
+        return self._fresh().find_by_tag(tag)
+
+    def iter_all(self, columns: Optional[Sequence[str]] = None) -> Iterator[Union[Recipe, tuple]]:
+        return self._fresh().iter_all(columns)
+
+    def iter_by_tag(self, tag: str, columns: Optional[Sequence[str]] = None) -> Iterator[Union[Recipe, tuple]]:
+        return self._fresh().iter_by_tag(tag, columns)
+
+    def list_between(self, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None,
+                     limit: Optional[int] = None) -> List[Recipe]:
+        return self._fresh().list_between(start, end, limit)
+
+    def count_by_date(self) -> Dict[str, int]:
+        return self._fresh().count_by_date()
+
+    def count_by_day(self, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None,
+                     limit: Optional[int] = None) -> Dict[datetime.date, int]:
+        return self._fresh().count_by_day(start, end, limit)
+
+    def close(self) -> None:
+        self.backing.close()
@@ -8,17 +8,24 @@ from typing import List, Optional
 Содержит:
 - исключения приложения
 - dataclass Recipe
+- протокол RecipeStore — интерфейс хранилища, на который опирается контроллер
 - класс RecipeDB для работы с БД (создание таблицы, CRUD, агрегация)
 """
 
 from dataclasses import dataclass
-from typing import Optional, List, Tuple, Dict
+from typing import Callable, Optional, List, Tuple, Dict, Iterator, Protocol, Sequence, Union
 import sqlite3
 import datetime
+import threading
+import time
 import json
 import os
 
 
+# Версия схемы БД (PRAGMA user_version); миграции — RecipeDB._migrate_to_vN
+SCHEMA_VERSION = 2
+
+
 # -----------------------
 # Исключения
 # -----------------------
@@ -32,9 +39,36 @@ class RecipeNotFoundError(RecipeError):
     pass
 
 
+class DuplicateRecipeError(RecipeError):
+    """Выбрасывается, если добавляемый рецепт почти совпадает с уже существующим."""
+    def __init__(self, message: str, duplicate_of: int):
+        super().__init__(message)
+        self.duplicate_of = duplicate_of
+
+
 # -----------------------
 # Dataclass Recipe
 # -----------------------
+EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def to_epoch(value: datetime.datetime) -> int:
+    """datetime -> секунды unix epoch. Наивные значения считаются UTC."""
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return int((value - EPOCH).total_seconds())
+
+
+def from_epoch(ts: int) -> datetime.datetime:
+    """Секунды unix epoch -> наивный datetime в UTC."""
+    return EPOCH + datetime.timedelta(seconds=ts)
+
+
+def split_tags(tags: str) -> List[str]:
+    """CSV-строка тегов -> нормализованный список (нижний регистр, без пустых и повторов, порядок сохраняется)."""
+    return list(dict.fromkeys(t for t in (part.strip().lower() for part in tags.split(",")) if t))
+
+
 @dataclass
 class Recipe:
     id: Optional[int]
@@ -42,11 +76,25 @@ class Recipe:
     ingredients: str  # свободный текст или JSON-строка
     steps: str
     tags: str         # CSV строка: "dessert,vegetarian"
-    created_at: str   # ISO 8601, например "2025-11-04T12:34:56"
+    created_at: datetime.datetime  # UTC без tzinfo; в БД хранится как unix epoch (INTEGER)
+
+    def __post_init__(self):
+        # ISO-строки принимаются для обратной совместимости
+        if isinstance(self.created_at, str):
+            try:
+                self.created_at = datetime.datetime.fromisoformat(self.created_at)
+            except ValueError:
+                raise RecipeError(f"Некорректная дата создания: {self.created_at!r}")
+        if self.created_at.tzinfo is not None:
+            self.created_at = from_epoch(to_epoch(self.created_at))
+
+    @staticmethod
+    def now() -> datetime.datetime:
+        return datetime.datetime.utcnow().replace(microsecond=0)
 
     @staticmethod
     def now_iso() -> str:
-        return datetime.datetime.utcnow().replace(microsecond=0).isoformat()
+        return Recipe.now().isoformat()
 
     @classmethod
     def from_row(cls, row: Tuple) -> "Recipe":
@@ -57,11 +105,140 @@ class Recipe:
             ingredients=row[2] or "",
             steps=row[3] or "",
             tags=row[4] or "",
-            created_at=row[5] or ""
+            created_at=from_epoch(row[5])
         )
 
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "title": self.title,
+            "ingredients": self.ingredients,
+            "steps": self.steps,
+            "tags": self.tags,
+            "created_at": self.created_at.isoformat(),
+        }
+
     def to_tuple_for_insert(self) -> Tuple:
-        return (self.title, self.ingredients, self.steps, self.tags, self.created_at)
+        return (self.title, self.ingredients, self.steps, self.tags, to_epoch(self.created_at))
+
+
+# -----------------------
+# Интерфейс хранилища
+# -----------------------
+class RecipeStore(Protocol):
+    """
+    Хранилище рецептов, с которым работает RecipeController.
+    Реализации: RecipeDB (SQLite), MemoryRecipeDB и CachedRecipeDB (memory_store.py).
+    Списки возвращаются от новых к старым; удаление мягкое (restore отменяет).
+    """
+
+    @property
+    def version(self) -> int: ...
+
+    def add(self, recipe: Recipe) -> int: ...
+
+    def add_many(self, recipes: List[Recipe]) -> List[int]: ...
+
+    def list_all(self, limit: Optional[int] = None) -> List[Recipe]: ...
+
+    def get(self, recipe_id: int) -> Recipe: ...
+
+    def update(self, recipe_id: int, title: str, ingredients: str, steps: str, tags: str) -> None: ...
+
+    def delete(self, recipe_id: int) -> None: ...
+
+    def restore(self, recipe_id: int) -> None: ...
+
+    def find_by_tag(self, tag: str) -> List[Recipe]: ...
+
+    def iter_all(self, columns: Optional[Sequence[str]] = None) -> Iterator[Union[Recipe, tuple]]: ...
+
+    def iter_by_tag(self, tag: str, columns: Optional[Sequence[str]] = None) -> Iterator[Union[Recipe, tuple]]: ...
+
+    def list_between(self, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None,
+                     limit: Optional[int] = None) -> List[Recipe]: ...
+
+    def count_by_date(self) -> Dict[str, int]: ...
+
+    def count_by_day(self, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None,
+                     limit: Optional[int] = None) -> Dict[datetime.date, int]: ...
+
+    def seed(self, recipes: List[Recipe]) -> None: ...
+
+    def close(self) -> None: ...
+
+
+# -----------------------
+# Запросы
+# -----------------------
+# Каждый запрос — неизменная строка с параметрами: кэш подготовленных
+# выражений sqlite3 (ключ — текст SQL) всегда попадает.
+RECIPE_COLUMNS = ("id", "title", "ingredients", "steps", "tags", "created_at")
+_RECIPE_COLUMNS = ", ".join(RECIPE_COLUMNS)
+_LIVE_ORDER = "ORDER BY created_at DESC, id DESC"
+# шаблоны для iter_*: {columns} — проверенный список столбцов (см. check_columns)
+_SQL_ITER_ALL = "SELECT {columns} FROM recipes WHERE deleted_at IS NULL " + _LIVE_ORDER
+_SQL_ITER_BY_TAG = "SELECT {columns} FROM recipes WHERE tags LIKE ? AND deleted_at IS NULL " + _LIVE_ORDER
+
+SQL_INSERT = "INSERT INTO recipes(title, ingredients, steps, tags, created_at) VALUES (?, ?, ?, ?, ?)"
+SQL_INSERT_WITH_ID = "INSERT INTO recipes(id, title, ingredients, steps, tags, created_at) VALUES (?, ?, ?, ?, ?, ?)"
+SQL_GET = f"SELECT {_RECIPE_COLUMNS} FROM recipes WHERE id = ? AND deleted_at IS NULL"
+SQL_LIST_ALL = _SQL_ITER_ALL.format(columns=_RECIPE_COLUMNS) + " LIMIT ?"
+SQL_FIND_BY_TAG = _SQL_ITER_BY_TAG.format(columns=_RECIPE_COLUMNS)
+SQL_LIST_BETWEEN = (f"SELECT {_RECIPE_COLUMNS} FROM recipes "
+                    f"WHERE created_at >= ? AND created_at < ? AND deleted_at IS NULL {_LIVE_ORDER} LIMIT ?")
+SQL_COUNT_BY_DAY = """
+SELECT created_at / 86400 AS day, COUNT(*) AS cnt
+FROM recipes
+WHERE created_at >= ? AND created_at < ? AND deleted_at IS NULL
+GROUP BY day
+ORDER BY day DESC
+LIMIT ?
+"""
+SQL_UPDATE = "UPDATE recipes SET title = ?, ingredients = ?, steps = ?, tags = ? WHERE id = ? AND deleted_at IS NULL"
+SQL_SOFT_DELETE = "UPDATE recipes SET deleted_at = ? WHERE id = ? AND deleted_at IS NULL"
+SQL_RESTORE = "UPDATE recipes SET deleted_at = NULL WHERE id = ? AND deleted_at IS NOT NULL"
+SQL_PURGE = """
+DELETE FROM recipes WHERE id IN (
+    SELECT id FROM recipes WHERE deleted_at IS NOT NULL AND deleted_at < ? LIMIT ?
+)"""
+
+# Размер пачки fetchmany при построчном чтении (iter_*)
+FETCH_CHUNK = 256
+# Онлайн-копия (RecipeDB.backup): страниц за шаг и пауза между шагами, с
+BACKUP_PAGES = 256
+BACKUP_PAUSE = 0.005
+# Без LIMIT: SQLite трактует отрицательный LIMIT как «без ограничения»
+NO_LIMIT = -1
+
+
+def recipe_row_factory(cursor, row) -> Recipe:
+    """row_factory для курсора: строка (id, title, ingredients, steps, tags, created_at) сразу в Recipe."""
+    return Recipe(row[0], row[1], row[2] or "", row[3] or "", row[4] or "", EPOCH + datetime.timedelta(seconds=row[5]))
+
+
+def check_columns(columns: Optional[Sequence[str]]) -> Optional[Tuple[str, ...]]:
+    """Проверяет проекцию для iter_*: None — целые Recipe, иначе кортежи из этих столбцов."""
+    if columns is None:
+        return None
+    columns = tuple(columns)
+    unknown = [c for c in columns if c not in RECIPE_COLUMNS]
+    if not columns or unknown:
+        raise RecipeError(f"Неизвестные столбцы: {', '.join(unknown) or '(пусто)'}")
+    return columns
+
+
+def project(recipe: Recipe, columns: Tuple[str, ...]) -> tuple:
+    """Кортеж из выбранных полей рецепта (та же форма, что у RecipeDB.iter_* с columns)."""
+    return tuple(getattr(recipe, c) for c in columns)
+
+
+def _projection_factory(columns: Tuple[str, ...]):
+    """row_factory для проекции: created_at (epoch) -> datetime, остальное как есть."""
+    if "created_at" not in columns:
+        return None
+    k = columns.index("created_at")
+    return lambda cursor, row: row[:k] + (EPOCH + datetime.timedelta(seconds=row[k]),) + row[k + 1:]
 
 
 # -----------------------
@@ -79,102 +256,349 @@ class RecipeDB:
         base_dir = os.path.dirname(os.path.abspath(db_path))
         os.makedirs(base_dir, exist_ok=True)
         # разрешаем многопоточность для GUI (check_same_thread=False)
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=64)
+        self._writes = 0
+        # курсор на поток для запросов, читаемых целиком (курсор нельзя делить между потоками)
+        self._local = threading.local()
         self._ensure_table()
+        # WAL: потоковое чтение (iter_*, страница /) не держит блокировку, мешающую
+        # писателям из других соединений — обслуживанию, копиям, второму процессу.
+        # synchronous=NORMAL в WAL не рискует целостностью, только последней транзакцией при сбое питания.
+        self.conn.execute("PRAGMA journal_mode = WAL").fetchone()
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+
+    # -----------------------
+    # Выполнение запросов
+    # -----------------------
+    def _recipe_cursor(self) -> sqlite3.Cursor:
+        cur = getattr(self._local, "cursor", None)
+        if cur is None:
+            cur = self._local.cursor = self.conn.cursor()
+            cur.row_factory = recipe_row_factory
+        return cur
+
+    def _fetch_one(self, sql: str, params: Tuple) -> Optional[Recipe]:
+        cur = self._recipe_cursor()
+        cur.execute(sql, params)
+        return cur.fetchone()
+
+    def _fetch_all(self, sql: str, params: Tuple) -> List[Recipe]:
+        cur = self._recipe_cursor()
+        cur.execute(sql, params)
+        return cur.fetchall()
+
+    def _iter(self, template: str, params: Tuple, columns: Optional[Sequence[str]], chunk: int) -> Iterator:
+        columns = check_columns(columns)
+        cur = self.conn.cursor()
+        if columns is None:
+            cur.row_factory = recipe_row_factory
+            sql = template.format(columns=_RECIPE_COLUMNS)
+        else:
+            cur.row_factory = _projection_factory(columns)
+            sql = template.format(columns=", ".join(columns))
+        cur.execute(sql, params)
+        return self._drain(cur, max(1, int(chunk)))
+
+    @staticmethod
+    def _drain(cur: sqlite3.Cursor, chunk: int) -> Iterator:
+        # у каждого итератора свой курсор: обходы можно вкладывать и чередовать с записью
+        try:
+            while True:
+                rows = cur.fetchmany(chunk)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            cur.close()
+
+
+    @property
+    def version(self) -> int:
+        """
+        Версия данных: меняется после каждой записи — своей (счётчик) или
+        чужого соединения (PRAGMA data_version). Годится как ключ кэша.
+        """
+        other = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        return self._writes + other
 
     def _ensure_table(self):
         cur = self.conn.cursor()
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS recipes (
+        version = cur.execute("PRAGMA user_version").fetchone()[0]
+        exists = cur.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recipes'"
+        ).fetchone()
+        if not exists:
+            # created_at — секунды unix epoch (UTC), индекс обслуживает сортировку и диапазоны.
+            # deleted_at — метка мягкого удаления; частичные индексы содержат только живые строки.
+            cur.executescript(f"""
+            PRAGMA auto_vacuum = INCREMENTAL;
+            BEGIN;
+            CREATE TABLE recipes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                ingredients TEXT,
+                steps TEXT,
+                tags TEXT,
+                created_at INTEGER NOT NULL,
+                deleted_at INTEGER
+            );
+            CREATE INDEX idx_recipes_live_created_at ON recipes(created_at) WHERE deleted_at IS NULL;
+            CREATE INDEX idx_recipes_deleted_at ON recipes(deleted_at) WHERE deleted_at IS NOT NULL;
+            PRAGMA user_version = {SCHEMA_VERSION};
+            COMMIT;
+            """)
+            return
+        for step in range(version + 1, SCHEMA_VERSION + 1):
+            try:
+                getattr(self, f"_migrate_to_v{step}")(cur)
+            except Exception:
+                self.conn.rollback()
+                raise
+        self._ensure_auto_vacuum(cur)
+
+    @staticmethod
+    def _ensure_auto_vacuum(cur):
+        # auto_vacuum переключается только полным VACUUM (один раз); дальше место
+        # возвращается по частям через incremental_vacuum. Проверяется при каждом
+        # открытии, а не по user_version: VACUUM после миграции мог не дойти до конца.
+        if cur.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:  # INCREMENTAL
+            return
+        try:
+            cur.executescript("PRAGMA auto_vacuum = INCREMENTAL; VACUUM;")
+        except sqlite3.OperationalError:
+            # БД занята другим соединением — переключим при следующем открытии
+            pass
+
+    def _migrate_to_v1(self, cur):
+        # created_at TEXT (ISO 8601) -> INTEGER (unix epoch) + индекс.
+        # Таблица пересоздаётся, т.к. SQLite не умеет менять тип столбца.
+        seq = cur.execute("SELECT seq FROM sqlite_sequence WHERE name = 'recipes'").fetchone()
+        cur.executescript(f"""
+        BEGIN;
+        CREATE TABLE recipes_new (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             title TEXT NOT NULL,
             ingredients TEXT,
             steps TEXT,
             tags TEXT,
-            created_at TEXT
-        )
+            created_at INTEGER NOT NULL
+        );
+        INSERT INTO recipes_new(id, title, ingredients, steps, tags, created_at)
+            SELECT id, title, ingredients, steps, tags,
+                   COALESCE(CAST(strftime('%s', created_at) AS INTEGER), 0)
+            FROM recipes;
+        DROP TABLE recipes;
+        ALTER TABLE recipes_new RENAME TO recipes;
+        CREATE INDEX idx_recipes_created_at ON recipes(created_at);
+        UPDATE sqlite_sequence SET seq = max(seq, {int(seq[0]) if seq else 0}) WHERE name = 'recipes';
+        PRAGMA user_version = 1;
+        COMMIT;
         """)
-        self.conn.commit()
+
+    def _migrate_to_v2(self, cur):
+        # Мягкое удаление: deleted_at IS NULL — живая строка.
+        cur.executescript("""
+        BEGIN;
+        ALTER TABLE recipes ADD COLUMN deleted_at INTEGER;
+        DROP INDEX IF EXISTS idx_recipes_created_at;
+        CREATE INDEX idx_recipes_live_created_at ON recipes(created_at) WHERE deleted_at IS NULL;
+        CREATE INDEX idx_recipes_deleted_at ON recipes(deleted_at) WHERE deleted_at IS NOT NULL;
+        PRAGMA user_version = 2;
+        COMMIT;
+        """)
+        # auto_vacuum = INCREMENTAL включает _ensure_auto_vacuum после всех миграций
 
     # Create
     def add(self, recipe: Recipe) -> int:
         if not recipe.title or not recipe.title.strip():
             raise RecipeError("Название рецепта не может быть пустым")
-        cur = self.conn.cursor()
-        cur.execute(
-            "INSERT INTO recipes(title, ingredients, steps, tags, created_at) VALUES (?, ?, ?, ?, ?)",
-            recipe.to_tuple_for_insert()
-        )
+        cur = self.conn.execute(SQL_INSERT, recipe.to_tuple_for_insert())
         self.conn.commit()
+        self._writes += 1
         return cur.lastrowid
 
+    # Create many (одна транзакция) -> id в порядке входного списка
+    def add_many(self, recipes: List[Recipe]) -> List[int]:
+        for recipe in recipes:
+            if not recipe.title or not recipe.title.strip():
+                raise RecipeError("Название рецепта не может быть пустым")
+        ids = []
+        try:
+            for recipe in recipes:
+                ids.append(self.conn.execute(SQL_INSERT, recipe.to_tuple_for_insert()).lastrowid)
+        except Exception:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+        self._writes += 1
+        return ids
+
+    # Create с уже назначенными id (их выдаёт общая последовательность, см. sharding.py)
+    def put_many(self, recipes: List[Recipe]) -> None:
+        for recipe in recipes:
+            if recipe.id is None:
+                raise RecipeError("Для вставки с заданным id у рецепта должен быть id")
+            if not recipe.title or not recipe.title.strip():
+                raise RecipeError("Название рецепта не может быть пустым")
+        try:
+            self.conn.executemany(SQL_INSERT_WITH_ID, [(r.id, *r.to_tuple_for_insert()) for r in recipes])
+        except sqlite3.IntegrityError as e:
+            self.conn.rollback()
+            raise RecipeError(f"Рецепт с таким id уже есть: {e}")
+        self.conn.commit()
+        self._writes += 1
+
     # Read all
     def list_all(self, limit: Optional[int] = None) -> List[Recipe]:
-        cur = self.conn.cursor()
-        q = "SELECT id, title, ingredients, steps, tags, created_at FROM recipes ORDER BY created_at DESC"
-        if limit:
-            q += f" LIMIT {int(limit)}"
-        cur.execute(q)
-        rows = cur.fetchall()
-        return [Recipe.from_row(tuple(r)) for r in rows]
+        return self._fetch_all(SQL_LIST_ALL, (int(limit) if limit else NO_LIMIT,))
 
     # Read one
     def get(self, recipe_id: int) -> Recipe:
-        cur = self.conn.cursor()
-        cur.execute("SELECT id, title, ingredients, steps, tags, created_at FROM recipes WHERE id = ?", (recipe_id,))
-        row = cur.fetchone()
-        if not row:
+        recipe = self._fetch_one(SQL_GET, (recipe_id,))
+        if recipe is None:
             raise RecipeNotFoundError(f"Рецепт с id={recipe_id} не найден")
-        return Recipe.from_row(tuple(row))
+        return recipe
 
     # Update
     def update(self, recipe_id: int, title: str, ingredients: str, steps: str, tags: str) -> None:
-        cur = self.conn.cursor()
-        cur.execute(
-            "UPDATE recipes SET title = ?, ingredients = ?, steps = ?, tags = ? WHERE id = ?",
-            (title, ingredients, steps, tags, recipe_id)
-        )
+        cur = self.conn.execute(SQL_UPDATE, (title, ingredients, steps, tags, recipe_id))
         if cur.rowcount == 0:
             raise RecipeNotFoundError(f"Рецепт с id={recipe_id} не найден для обновления")
         self.conn.commit()
+        self._writes += 1
 
-    # Delete
+    # Delete (мягкое: строка помечается и удаляется физически позже, см. purge_deleted)
     def delete(self, recipe_id: int) -> None:
-        cur = self.conn.cursor()
-        cur.execute("DELETE FROM recipes WHERE id = ?", (recipe_id,))
+        cur = self.conn.execute(SQL_SOFT_DELETE, (to_epoch(Recipe.now()), recipe_id))
         if cur.rowcount == 0:
             raise RecipeNotFoundError(f"Рецепт с id={recipe_id} не найден для удаления")
         self.conn.commit()
+        self._writes += 1
+
+    # Отмена мягкого удаления (пока строка не вычищена purge_deleted)
+    def restore(self, recipe_id: int) -> None:
+        cur = self.conn.execute(SQL_RESTORE, (recipe_id,))
+        if cur.rowcount == 0:
+            raise RecipeNotFoundError(f"Удалённый рецепт с id={recipe_id} не найден для восстановления")
+        self.conn.commit()
+        self._writes += 1
 
     # Поиск по тегу (в простом виде — ищем в строке tags)
     def find_by_tag(self, tag: str) -> List[Recipe]:
-        cur = self.conn.cursor()
-        like = f"%{tag}%"
-        cur.execute("SELECT id, title, ingredients, steps, tags, created_at FROM recipes WHERE tags LIKE ? ORDER BY created_at DESC", (like,))
-        rows = cur.fetchall()
-        return [Recipe.from_row(tuple(r)) for r in rows]
+        return self._fetch_all(SQL_FIND_BY_TAG, (f"%{tag}%",))
+
+    # Потоковое чтение: строки пачками по chunk, в памяти не держится весь каталог.
+    # columns=None -> Recipe, иначе кортежи из указанных столбцов (например ("id", "tags")).
+    # Запрос выполняется сразу, неизвестные столбцы -> RecipeError при вызове.
+    def iter_all(self, columns: Optional[Sequence[str]] = None,
+                 chunk: int = FETCH_CHUNK) -> Iterator[Union[Recipe, tuple]]:
+        return self._iter(_SQL_ITER_ALL, (), columns, chunk)
+
+    def iter_by_tag(self, tag: str, columns: Optional[Sequence[str]] = None,
+                    chunk: int = FETCH_CHUNK) -> Iterator[Union[Recipe, tuple]]:
+        return self._iter(_SQL_ITER_BY_TAG, (f"%{tag}%",), columns, chunk)
+
+    # Рецепты за период [start, end) -> новые сверху, идёт по индексу created_at
+    def list_between(self, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None,
+                     limit: Optional[int] = None) -> List[Recipe]:
+        return self._fetch_all(SQL_LIST_BETWEEN, (*self._epoch_range(start, end), int(limit) if limit else NO_LIMIT))
 
     # Количество добавлений по дате -> возвращает dict {date_str: count}
     def count_by_date(self) -> Dict[str, int]:
-        cur = self.conn.cursor()
-        # Берём только дату из ISO строки (до 'T') — SQLite SUBSTR or DATE functions are limited, но у нас ISO
-        cur.execute("""
-        SELECT substr(created_at,1,10) as day, COUNT(*) as cnt
-        FROM recipes
-        GROUP BY day
-        ORDER BY day ASC
-        """)
-        rows = cur.fetchall()
-        return {r["day"]: r["cnt"] for r in rows if r["day"]}
+        return {day.isoformat(): cnt for day, cnt in self.count_by_day().items()}
+
+    # Количество добавлений по дням за период -> {datetime.date: count}, по возрастанию даты.
+    # limit оставляет только последние limit дней, в которые были добавления.
+    def count_by_day(self, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None,
+                     limit: Optional[int] = None) -> Dict[datetime.date, int]:
+        rows = self.conn.execute(
+            SQL_COUNT_BY_DAY, (*self._epoch_range(start, end), int(limit) if limit else NO_LIMIT)
+        ).fetchall()
+        epoch_day = EPOCH.date()
+        return {epoch_day + datetime.timedelta(days=day): cnt for day, cnt in reversed(rows)}
+
+    @staticmethod
+    def _epoch_range(start: Optional[datetime.datetime], end: Optional[datetime.datetime]) -> Tuple[int, int]:
+        # Границы всегда передаются параметрами, чтобы текст запроса не менялся
+        lo = to_epoch(start) if start is not None else -(2 ** 63)
+        hi = to_epoch(end) if end is not None else 2 ** 63 - 1
+        return lo, hi
 
     # Удобный метод для заполнения тестовыми данными
     def seed(self, recipes: List[Recipe]) -> None:
-        cur = self.conn.cursor()
-        cur.executemany(
-            "INSERT INTO recipes(title, ingredients, steps, tags, created_at) VALUES (?, ?, ?, ?, ?)",
-            [r.to_tuple_for_insert() for r in recipes]
-        )
+        self.conn.executemany(SQL_INSERT, [r.to_tuple_for_insert() for r in recipes])
+        self.conn.commit()
+        self._writes += 1
+
+    # -----------------------
+    # Обслуживание (см. maintenance.py)
+    # -----------------------
+    # Физически удаляет помеченные строки старше older_than пачками по batch_size -> число строк
+    def purge_deleted(self, older_than: datetime.datetime, batch_size: int = 500) -> int:
+        if batch_size < 1:
+            # LIMIT 0 удаляет 0 строк, и условие выхода «пачка неполная» не наступает
+            raise ValueError("batch_size должен быть >= 1")
+        total = 0
+        while True:
+            purged = self.conn.execute(SQL_PURGE, (to_epoch(older_than), batch_size)).rowcount
+            # короткие транзакции: между пачками блокировка отпускается
+            self.conn.commit()
+            total += purged
+            if purged < batch_size:
+                break
+        if total:
+            self._writes += 1
+        return total
+
+    # Размер файла в страницах: {"page_size", "page_count", "freelist_count"}
+    def storage_stats(self) -> Dict[str, int]:
+        return {name: self.conn.execute(f"PRAGMA {name}").fetchone()[0]
+                for name in ("page_size", "page_count", "freelist_count")}
+
+    # Возвращает ОС свободные страницы (до pages штук; None — все)
+    def incremental_vacuum(self, pages: Optional[int] = None) -> None:
+        # executescript шагает до конца: через execute() pragma освобождает лишь одну страницу
+        self.conn.executescript(f"PRAGMA incremental_vacuum({int(pages) if pages else 0});")
+
+    # Онлайн-копия БД в новый файл dest_path (sqlite3 backup API, см. backup.py) -> всего страниц.
+    # Копирует шагами по pages страниц и спит pause секунд между шагами: блокировка
+    # чтения держится только на время шага, остальные запросы идут между шагами.
+    # Запись через это же соединение попадает в копию без перезапуска.
+    # progress(remaining, total) может прервать копирование исключением.
+    def backup(self, dest_path: str, pages: int = BACKUP_PAGES, pause: float = BACKUP_PAUSE,
+               progress: Optional[Callable[[int, int], None]] = None) -> int:
+        totals = {"pages": 0}
+
+        def step(status, remaining, total):
+            totals["pages"] = total
+            if progress:
+                progress(remaining, total)
+            if remaining and pause > 0:
+                time.sleep(pause)
+
+        target = sqlite3.connect(dest_path)
+        try:
+            # без журнала и fsync внутри шага: иначе последний шаг держит блокировку
+            # источника на время сброса всей копии на диск
+            target.execute("PRAGMA journal_mode = OFF")
+            target.execute("PRAGMA synchronous = OFF")
+            self.conn.backup(target, pages=max(1, int(pages)), progress=step)
+            # страницы копируются вместе с отметкой WAL в заголовке; копия — самостоятельный
+            # файл, без -wal/-shm рядом при открытии
+            target.execute("PRAGMA journal_mode = DELETE").fetchone()
+        finally:
+            target.close()
+        # на запись: в Windows fsync (_commit) дескриптора только для чтения падает с EBADF
+        fd = os.open(dest_path, os.O_RDWR)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        return totals["pages"]
+
+    # Обновляет статистику планировщика: analyze=True — полный ANALYZE, иначе PRAGMA optimize
+    def optimize(self, analyze: bool = False) -> None:
+        self.conn.execute("ANALYZE" if analyze else "PRAGMA optimize").fetchall()
         self.conn.commit()
 
     def close(self):
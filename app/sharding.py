@@ -0,0 +1,325 @@
+# app/sharding.py
+"""
+Шардированное хранилище рецептов: N файлов SQLite за API RecipeDB.
+
+Каталог хранилища:
+- meta.db — число шардов и общая последовательность id;
+- shard_<i>.db — обычные базы RecipeDB, рецепт с id лежит в шарде id % N.
+
+Запись идёт в один шард, чтение по всему каталогу (list_all, find_by_tag,
+list_between, count_by_day) — параллельно во всех шардах через пул потоков
+(sqlite3 отпускает GIL на время запроса) с k-way слиянием упорядоченных
+ответов. id глобальные и не меняются при перешардировании:
+
+    python -m app.sharding reshard recipes.db recipes_shards --shards 4
+    python -m app.sharding reshard recipes_shards recipes_shards8 --shards 8
+"""
+
+import argparse
+import dataclasses
+import datetime
+import heapq
+import itertools
+import os
+import pathlib
+import shutil
+import sqlite3
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+from .models import Recipe, RecipeDB, RecipeError, check_columns
+
+# Число шардов для нового хранилища
+DEFAULT_SHARDS = 4
+META_FILE = "meta.db"
+# Сколько строк копировать одной пачкой при перешардировании
+RESHARD_BATCH = 1000
+
+SQL_META_SCHEMA = "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+SQL_META_GET = "SELECT value FROM meta WHERE key = ?"
+SQL_META_INIT = "INSERT OR IGNORE INTO meta(key, value) VALUES (?, ?)"
+SQL_META_SET = "UPDATE meta SET value = ? WHERE key = ?"
+# атомарно резервирует блок id: UPDATE берёт блокировку записи, так что блоки не пересекаются и между процессами
+SQL_NEXT_IDS = "UPDATE meta SET value = value + ? WHERE key = 'next_id' RETURNING value"
+
+_ROW_COLUMNS = "id, title, ingredients, steps, tags, created_at, deleted_at"
+SQL_COPY_SELECT = f"SELECT {_ROW_COLUMNS} FROM recipes ORDER BY id"
+SQL_COPY_INSERT = f"INSERT INTO recipes({_ROW_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)"
+
+
+def shard_path(root: str, i: int) -> str:
+    return os.path.join(root, f"shard_{i}.db")
+
+
+def _newest_first(recipe: Recipe):
+    return recipe.created_at, recipe.id
+
+
+class ShardedRecipeDB:
+    """
+    RecipeStore поверх нескольких RecipeDB.
+    shards=None открывает существующее хранилище (или создаёт DEFAULT_SHARDS);
+    число, расходящееся с записанным в meta.db, — ошибка: для смены есть reshard().
+    add_many атомарен в пределах шарда, но не всего пакета.
+    """
+
+    def __init__(self, root: str, shards: Optional[int] = None):
+        self.root = root
+        self.db_path = root
+        os.makedirs(root, exist_ok=True)
+        self.meta = sqlite3.connect(os.path.join(root, META_FILE), check_same_thread=False)
+        self.meta.execute(SQL_META_SCHEMA)
+        self.meta.execute(SQL_META_INIT, ("shards", shards or DEFAULT_SHARDS))
+        self.meta.execute(SQL_META_INIT, ("next_id", 1))
+        self.meta.commit()
+        stored = self._meta("shards")
+        if shards is not None and shards != stored:
+            self.meta.close()
+            raise RecipeError(f"Хранилище {root} разбито на {stored} шардов, а не {shards}: используйте reshard")
+        self._id_lock = threading.Lock()
+        self.shards: List[RecipeDB] = [RecipeDB(shard_path(root, i)) for i in range(stored)]
+        self._pool = ThreadPoolExecutor(max_workers=stored, thread_name_prefix="shard")
+
+    def _meta(self, key: str) -> int:
+        return self.meta.execute(SQL_META_GET, (key,)).fetchone()[0]
+
+    @property
+    def version(self) -> int:
+        # версии шардов не убывают, значит сумма меняется при любой записи
+        return sum(shard.version for shard in self.shards)
+
+    # -----------------------
+    # Маршрутизация
+    # -----------------------
+    def _shard(self, recipe_id: int) -> RecipeDB:
+        return self.shards[recipe_id % len(self.shards)]
+
+    def _next_ids(self, n: int) -> range:
+        with self._id_lock:
+            end = self.meta.execute(SQL_NEXT_IDS, (n,)).fetchone()[0]
+            self.meta.commit()
+        return range(end - n, end)
+
+    def _each(self, fn: Callable[[RecipeDB], object]) -> List:
+        """fn для каждого шарда параллельно; результаты в порядке шардов."""
+        return list(self._pool.map(fn, self.shards))
+
+    def _merged(self, parts: List[List[Recipe]], limit: Optional[int] = None) -> List[Recipe]:
+        merged = heapq.merge(*parts, key=_newest_first, reverse=True)
+        return list(itertools.islice(merged, int(limit)) if limit else merged)
+
+    # -----------------------
+    # Запись
+    # -----------------------
+    def add(self, recipe: Recipe) -> int:
+        return self.add_many([recipe])[0]
+
+    def add_many(self, recipes: List[Recipe]) -> List[int]:
+        for recipe in recipes:
+            if not recipe.title or not recipe.title.strip():
+                raise RecipeError("Название рецепта не может быть пустым")
+        ids = list(self._next_ids(len(recipes))) if recipes else []
+        batches: Dict[int, List[Recipe]] = defaultdict(list)
+        for recipe, rid in zip(recipes, ids):
+            batches[rid % len(self.shards)].append(dataclasses.replace(recipe, id=rid))
+        for i, batch in batches.items():
+            self.shards[i].put_many(batch)
+        return ids
+
+    def seed(self, recipes: List[Recipe]) -> None:
+        self.add_many(recipes)
+
+    def update(self, recipe_id: int, title: str, ingredients: str, steps: str, tags: str) -> None:
+        self._shard(recipe_id).update(recipe_id, title, ingredients, steps, tags)
+
+    def delete(self, recipe_id: int) -> None:
+        self._shard(recipe_id).delete(recipe_id)
+
+    def restore(self, recipe_id: int) -> None:
+        self._shard(recipe_id).restore(recipe_id)
+
+    # -----------------------
+    # Чтение
+    # -----------------------
+    def get(self, recipe_id: int) -> Recipe:
+        return self._shard(recipe_id).get(recipe_id)
+
+    def list_all(self, limit: Optional[int] = None) -> List[Recipe]:
+        # каждому шарду хватает limit первых строк: остальные в общий топ не попадут
+        return self._merged(self._each(lambda shard: shard.list_all(limit)), limit)
+
+    def find_by_tag(self, tag: str) -> List[Recipe]:
+        return self._merged(self._each(lambda shard: shard.find_by_tag(tag)))
+
+    def list_between(self, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None,
+                     limit: Optional[int] = None) -> List[Recipe]:
+        return self._merged(self._each(lambda shard: shard.list_between(start, end, limit)), limit)
+
+    def _iter_merged(self, iters: Callable[[RecipeDB, Sequence[str]], Iterator],
+                     columns: Optional[Sequence[str]]) -> Iterator[Union[Recipe, tuple]]:
+        columns = check_columns(columns)
+        if columns is None:
+            return heapq.merge(*(iters(shard, None) for shard in self.shards), key=_newest_first, reverse=True)
+        # для слияния нужны created_at и id — добавляем их к проекции и срезаем на выходе
+        n = len(columns)
+        full = columns + ("created_at", "id")
+        merged = heapq.merge(*(iters(shard, full) for shard in self.shards),
+                             key=lambda row: (row[n], row[n + 1]), reverse=True)
+        return (row[:n] for row in merged)
+
+    def iter_all(self, columns: Optional[Sequence[str]] = None) -> Iterator[Union[Recipe, tuple]]:
+        return self._iter_merged(lambda shard, cols: shard.iter_all(cols), columns)
+
+    def iter_by_tag(self, tag: str, columns: Optional[Sequence[str]] = None) -> Iterator[Union[Recipe, tuple]]:
+        return self._iter_merged(lambda shard, cols: shard.iter_by_tag(tag, cols), columns)
+
+    def count_by_date(self) -> Dict[str, int]:
+        return {day.isoformat(): cnt for day, cnt in self.count_by_day().items()}
+
+    def count_by_day(self, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None,
+                     limit: Optional[int] = None) -> Dict[datetime.date, int]:
+        # день из общих последних limit дней входит и в последние limit дней любого шарда, где он есть
+        totals: Dict[datetime.date, int] = defaultdict(int)
+        for counts in self._each(lambda shard: shard.count_by_day(start, end, limit)):
+            for day, cnt in counts.items():
+                totals[day] += cnt
+        days = sorted(totals)
+        if limit:
+            days = days[-int(limit):]
+        return {day: totals[day] for day in days}
+
+    # -----------------------
+    # Обслуживание
+    # -----------------------
+    def purge_deleted(self, older_than: datetime.datetime, batch_size: int = 500) -> int:
+        return sum(self._each(lambda shard: shard.purge_deleted(older_than, batch_size)))
+
+    def storage_stats(self) -> Dict[str, int]:
+        stats = self._each(lambda shard: shard.storage_stats())
+        return {
+            "page_size": stats[0]["page_size"],
+            "page_count": sum(s["page_count"] for s in stats),
+            "freelist_count": sum(s["freelist_count"] for s in stats),
+        }
+
+    def incremental_vacuum(self, pages: Optional[int] = None) -> None:
+        self._each(lambda shard: shard.incremental_vacuum(pages))
+
+    def optimize(self, analyze: bool = False) -> None:
+        self._each(lambda shard: shard.optimize(analyze))
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+        for shard in self.shards:
+            shard.close()
+        self.meta.close()
+
+
+# -----------------------
+# Перешардирование
+# -----------------------
+def _source_meta(source: str, key: str) -> int:
+    """Значение из meta.db каталога шардов; файл открывается только для чтения и не создаётся."""
+    uri = pathlib.Path(source, META_FILE).absolute().as_uri() + "?mode=ro"
+    try:
+        meta = sqlite3.connect(uri, uri=True)
+        try:
+            row = meta.execute(SQL_META_GET, (key,)).fetchone()
+        finally:
+            meta.close()
+    except sqlite3.Error as e:
+        raise RecipeError(f"{source} не является хранилищем шардов: {e}")
+    if row is None:
+        raise RecipeError(f"{source} не является хранилищем шардов: в {META_FILE} нет {key}")
+    return row[0]
+
+
+def _source_files(source: str) -> List[str]:
+    """Файлы-источники: один RecipeDB или все шарды каталога ShardedRecipeDB."""
+    if os.path.isdir(source):
+        files = [shard_path(source, i) for i in range(_source_meta(source, "shards"))]
+        missing = [path for path in files if not os.path.isfile(path)]
+        if missing:
+            raise RecipeError(f"В хранилище {source} нет шардов: {', '.join(missing)}")
+        return files
+    if not os.path.exists(source):
+        raise RecipeError(f"Источник {source} не найден")
+    return [source]
+
+
+def reshard(source: str, target: str, shards: int, batch_size: int = RESHARD_BATCH) -> int:
+    """
+    Копирует рецепты из source (файл RecipeDB или каталог шардов) в новое
+    хранилище target на shards шардов. id и мягко удалённые строки сохраняются,
+    источник не меняется. Возвращает число скопированных строк.
+    """
+    files = _source_files(source)
+    if os.path.exists(target) and os.listdir(target):
+        raise RecipeError(f"Каталог {target} не пуст")
+    created = not os.path.exists(target)
+    dst = ShardedRecipeDB(target, shards)
+    copied = 0
+    max_id = 0
+    try:
+        for path in files:
+            try:
+                src = RecipeDB(path)  # заодно мигрирует старую схему
+            except sqlite3.DatabaseError as e:
+                raise RecipeError(f"Не удалось открыть источник {path}: {e}")
+            try:
+                rows = src.conn.execute(SQL_COPY_SELECT)
+                while True:
+                    batch = rows.fetchmany(batch_size)
+                    if not batch:
+                        break
+                    grouped: Dict[int, List[tuple]] = defaultdict(list)
+                    for row in batch:
+                        grouped[row[0] % shards].append(row)
+                    for i, group in grouped.items():
+                        dst.shards[i].conn.executemany(SQL_COPY_INSERT, group)
+                        dst.shards[i].conn.commit()
+                    copied += len(batch)
+                    max_id = max(max_id, batch[-1][0])
+            finally:
+                src.close()
+        # последовательность продолжается за наибольшим id (и не раньше, чем в источнике)
+        next_id = max_id + 1
+        if os.path.isdir(source):
+            next_id = max(next_id, _source_meta(source, "next_id"))
+        dst.meta.execute(SQL_META_SET, (next_id, "next_id"))
+        dst.meta.commit()
+    except BaseException:
+        dst.close()
+        # недокопированное хранилище убираем, иначе повтор упрётся в «каталог не пуст»
+        if created:
+            shutil.rmtree(target, ignore_errors=True)
+        else:
+            for name in os.listdir(target):
+                os.remove(os.path.join(target, name))
+        raise
+    dst.close()
+    return copied
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.sharding", description="Шардированное хранилище рецептов")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("reshard", help="скопировать рецепты в новое хранилище на N шардов")
+    p.add_argument("source", help="файл RecipeDB или каталог шардов")
+    p.add_argument("target", help="новый (пустой) каталог")
+    p.add_argument("--shards", type=int, default=DEFAULT_SHARDS)
+    args = parser.parse_args(argv)
+
+    if args.shards < 1:
+        parser.error("--shards должно быть не меньше 1")
+    try:
+        copied = reshard(args.source, args.target, args.shards)
+    except RecipeError as e:
+        parser.exit(1, f"Ошибка: {e}\n")
+    print(f"Скопировано рецептов: {copied} -> {args.target} ({args.shards} шардов)")
+
+
+if __name__ == "__main__":
+    main()
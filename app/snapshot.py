@@ -0,0 +1,184 @@
+﻿# app/snapshot.py
+"""
+Бинарный снимок каталога для быстрой загрузки и офлайн-аналитики.
+
+Снимок — каталог с файлом-указателем CURRENT и версиями v<номер>/; каждая
+версия — каталог из .npy-файлов (по столбцу на файл) и meta.json:
+- id.npy, created_at.npy — int64 (created_at в секундах unix epoch, как в БД);
+- <столбец>.offsets.npy (int64, n + 1) и <столбец>.heap.npy (uint8, UTF-8) —
+  строковые столбцы: значение i лежит в heap[offsets[i]:offsets[i + 1]].
+
+Загрузка открывает файлы через mmap (np.load(mmap_mode="r")): данные не копируются,
+а страницы файла разделяются между процессами. Новая версия пишется рядом и
+публикуется атомарной подменой CURRENT (os.replace): читатели видят либо старый,
+либо новый снимок, а открытые через mmap файлы старой версии не трогаются.
+"""
+
+import json
+import os
+import re
+import shutil
+import time
+from array import array
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+
+from .models import Recipe, RecipeDB, RecipeError, from_epoch, to_epoch
+
+FORMAT_VERSION = 1
+TEXT_COLUMNS = ("title", "ingredients", "steps", "tags")
+# Файл-указатель на текущую версию снимка
+CURRENT = "CURRENT"
+# Имя каталога версии; v<номер>.tmp — версия, которую ещё пишет экспорт
+_VERSION_NAME = re.compile(r"v\d+")
+
+
+class SnapshotError(RecipeError):
+    """Снимок отсутствует, повреждён или записан в неподдерживаемом формате."""
+    pass
+
+
+def export_snapshot(db: RecipeDB, path: str) -> int:
+    """Записывает все рецепты db в каталог path. Возвращает количество рецептов."""
+    ids = array("q")
+    created = array("q")
+    heaps: Dict[str, bytearray] = {name: bytearray() for name in TEXT_COLUMNS}
+    offsets: Dict[str, array] = {name: array("q", [0]) for name in TEXT_COLUMNS}
+
+    for recipe in db.iter_all():
+        ids.append(recipe.id)
+        created.append(to_epoch(recipe.created_at))
+        for name in TEXT_COLUMNS:
+            heap = heaps[name]
+            heap += getattr(recipe, name).encode("utf-8")
+            offsets[name].append(len(heap))
+
+    # версия пишется во временный каталог и публикуется подменой указателя
+    _check_target(path)
+    os.makedirs(path, exist_ok=True)
+    version = f"v{time.time_ns()}"
+    tmp = os.path.join(path, version + ".tmp")
+    os.makedirs(tmp)
+    np.save(os.path.join(tmp, "id.npy"), np.frombuffer(ids, dtype=np.int64))
+    np.save(os.path.join(tmp, "created_at.npy"), np.frombuffer(created, dtype=np.int64))
+    for name in TEXT_COLUMNS:
+        np.save(os.path.join(tmp, f"{name}.offsets.npy"), np.frombuffer(offsets[name], dtype=np.int64))
+        np.save(os.path.join(tmp, f"{name}.heap.npy"), np.frombuffer(bytes(heaps[name]), dtype=np.uint8))
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"format": FORMAT_VERSION, "count": len(ids), "columns": list(TEXT_COLUMNS)}, f)
+    os.replace(tmp, os.path.join(path, version))
+
+    pointer = os.path.join(path, CURRENT + ".tmp")
+    with open(pointer, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(path, CURRENT))
+    _remove_stale_versions(path, version)
+    return len(ids)
+
+
+def _read_meta(path: str):
+    """meta.json снимка в каталоге path или None, если это не снимок."""
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if isinstance(meta, dict) and "format" in meta else None
+
+
+def _check_target(path: str) -> None:
+    """В непустой каталог снимок пишется, только если там уже лежит снимок."""
+    if not os.path.isdir(path) or not os.listdir(path):
+        return
+    if os.path.isfile(os.path.join(path, CURRENT)) or _read_meta(path) is not None:
+        return
+    raise SnapshotError(f"Каталог {path} не пуст и не содержит снимка")
+
+
+def _remove_stale_versions(path: str, current: str) -> None:
+    """
+    Удаляет прежние версии. Занятые (на Windows — открытые через mmap) остаются
+    до следующего экспорта. Трогаются только v<номер>/ и файлы снимка старого
+    формата: чужие файлы и незаконченные версии другого экспорта остаются.
+    """
+    for name in os.listdir(path):
+        full = os.path.join(path, name)
+        if _VERSION_NAME.fullmatch(name) and name != current and os.path.isdir(full):
+            shutil.rmtree(full, ignore_errors=True)
+    # снимок старого формата (без версий), лежавший прямо в path
+    meta = _read_meta(path)
+    if meta is None:
+        return
+    names = ["id.npy", "created_at.npy"]
+    for column in meta.get("columns", TEXT_COLUMNS):
+        names += [f"{column}.offsets.npy", f"{column}.heap.npy"]
+    for name in names + ["meta.json"]:
+        try:
+            os.remove(os.path.join(path, name))
+        except OSError:
+            pass
+
+
+class Snapshot:
+    """Снимок, открытый только для чтения; столбцы — массивы NumPy поверх mmap."""
+
+    def __init__(self, path: str):
+        self.path = path
+        # версия фиксируется при открытии; снимок старого формата — файлы прямо в path
+        try:
+            with open(os.path.join(path, CURRENT), encoding="utf-8") as f:
+                self.version_path = os.path.join(path, f.read().strip())
+        except FileNotFoundError:
+            self.version_path = path
+        except OSError as e:
+            raise SnapshotError(f"Не удалось открыть снимок {path}: {e}")
+        try:
+            with open(os.path.join(self.version_path, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"Не удалось открыть снимок {path}: {e}")
+        if meta.get("format") != FORMAT_VERSION:
+            raise SnapshotError(f"Неподдерживаемый формат снимка: {meta.get('format')}")
+
+        self.ids = self._load("id.npy")
+        self.created_at = self._load("created_at.npy")
+        self._text: Dict[str, Tuple[np.ndarray, np.ndarray]] = {
+            name: (self._load(f"{name}.offsets.npy"), self._load(f"{name}.heap.npy"))
+            for name in meta["columns"]
+        }
+        if len(self.ids) != meta["count"]:
+            raise SnapshotError(f"Снимок {path} повреждён: ожидалось {meta['count']} записей")
+
+    def _load(self, name: str) -> np.ndarray:
+        return np.load(os.path.join(self.version_path, name), mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def created_at_datetime64(self) -> np.ndarray:
+        """created_at как datetime64[s] — представление того же буфера, без копирования."""
+        return self.created_at.view("datetime64[s]")
+
+    def text(self, column: str, i: int) -> str:
+        offsets, heap = self._text[column]
+        return heap[offsets[i]:offsets[i + 1]].tobytes().decode("utf-8")
+
+    def recipe(self, i: int) -> Recipe:
+        return Recipe(
+            id=int(self.ids[i]),
+            title=self.text("title", i),
+            ingredients=self.text("ingredients", i),
+            steps=self.text("steps", i),
+            tags=self.text("tags", i),
+            created_at=from_epoch(int(self.created_at[i]))
+        )
+
+    def __iter__(self) -> Iterator[Recipe]:
+        for i in range(len(self)):
+            yield self.recipe(i)
+
+
+def load_snapshot(path: str) -> Snapshot:
+    return Snapshot(path)
@@ -0,0 +1,185 @@
+# app/tags.py
+"""
+Словарь тегов для автодополнения и фасетных счётчиков.
+Префиксное дерево (trie) строится один раз из столбца tags, дальше
+поддерживается событиями журнала изменений (changes.py): подсказки на
+каждое нажатие клавиши идут из памяти, без запросов к SQLite.
+"""
+
+import heapq
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .changes import ChangeEvent, ChangeLog, DELETE, INSERT, UPDATE
+from .models import split_tags
+
+# Сколько подсказок отдавать по умолчанию
+DEFAULT_LIMIT = 10
+
+
+class _Node:
+    __slots__ = ("children", "count")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.count = 0  # сколько живых рецептов с тегом, который заканчивается в этом узле
+
+
+class TagTrie:
+    """Префиксное дерево нормализованных тегов со счётчиками. Не потокобезопасно (см. TagIndex)."""
+
+    def __init__(self):
+        self._root = _Node()
+        self._size = 0
+
+    def __len__(self) -> int:
+        """Количество различных тегов со счётчиком > 0."""
+        return self._size
+
+    def _find(self, prefix: str) -> Optional[_Node]:
+        node = self._root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return None
+        return node
+
+    def add(self, tag: str, n: int = 1) -> None:
+        node = self._root
+        for ch in tag:
+            node = node.children.setdefault(ch, _Node())
+        if node.count == 0:
+            self._size += 1
+        node.count += n
+
+    def remove(self, tag: str, n: int = 1) -> None:
+        path = [self._root]
+        for ch in tag:
+            node = path[-1].children.get(ch)
+            if node is None:
+                return
+            path.append(node)
+        node = path[-1]
+        if node.count == 0:
+            return
+        node.count = max(0, node.count - n)
+        if node.count:
+            return
+        self._size -= 1
+        # срезаем опустевшую ветку, чтобы обход подсказок не заходил в мёртвые узлы
+        for depth in range(len(tag), 0, -1):
+            child = path[depth]
+            if child.count or child.children:
+                break
+            del path[depth - 1].children[tag[depth - 1]]
+
+    def count(self, tag: str) -> int:
+        node = self._find(tag)
+        return node.count if node else 0
+
+    def items(self, prefix: str = "") -> Iterator[Tuple[str, int]]:
+        """Все (тег, счётчик) с данным префиксом, в алфавитном порядке."""
+        node = self._find(prefix)
+        if node is None:
+            return
+        stack = [(prefix, node)]
+        while stack:
+            word, node = stack.pop()
+            if node.count:
+                yield word, node.count
+            for ch in sorted(node.children, reverse=True):
+                stack.append((word + ch, node.children[ch]))
+
+    def complete(self, prefix: str, limit: Optional[int] = DEFAULT_LIMIT) -> List[Tuple[str, int]]:
+        """Теги с префиксом: самые частые первыми, при равенстве — по алфавиту."""
+        key = lambda item: (-item[1], item[0])
+        if limit is None:
+            return sorted(self.items(prefix), key=key)
+        return heapq.nsmallest(int(limit), self.items(prefix), key=key)
+
+
+class TagIndex:
+    """
+    Словарь тегов каталога, подписанный на ChangeLog.
+    insert прибавляет теги рецепта, delete вычитает теги previous,
+    update — и то и другое. Запись из другого процесса журнал не видит:
+    для неё есть load().
+    """
+
+    def __init__(self, changes: Optional[ChangeLog] = None):
+        self._trie = TagTrie()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        # события, пришедшие во время load(); None — загрузка не идёт
+        self._pending: Optional[List[ChangeEvent]] = None
+        self._unsubscribe: Optional[Callable[[], None]] = None
+        if changes is not None:
+            self._unsubscribe = changes.subscribe(self.apply)
+
+    def load(self, rows: Iterable[Tuple[int, str]]) -> None:
+        """
+        Перестраивает словарь по парам (id рецепта, CSV-строка тегов).
+        Чтение идёт без блокировки: подсказки и события обслуживаются старым
+        деревом, а события за время чтения запоминаются. Перед подменой теги
+        затронутых ими рецептов пересчитываются по последнему событию: запись,
+        попавшая и в прочитанные строки, и в журнал, не считается дважды.
+        """
+        with self._load_lock:
+            with self._lock:
+                self._pending = []
+            try:
+                trie = TagTrie()
+                loaded: Dict[int, List[str]] = {}  # id -> учтённые теги (только непустые)
+                for recipe_id, tag_string in rows:
+                    tags = split_tags(tag_string or "")
+                    if tags:
+                        loaded[recipe_id] = tags
+                        for tag in tags:
+                            trie.add(tag)
+                with self._lock:
+                    latest: Dict[int, List[str]] = {}
+                    for event in self._pending:
+                        live = event.op in (INSERT, UPDATE) and event.recipe is not None
+                        latest[event.recipe_id] = split_tags(event.recipe.tags) if live else []
+                    for recipe_id, tags in latest.items():
+                        for tag in loaded.get(recipe_id, ()):
+                            trie.remove(tag)
+                        for tag in tags:
+                            trie.add(tag)
+                    self._trie = trie
+            finally:
+                with self._lock:
+                    self._pending = None
+
+    def apply(self, event: ChangeEvent) -> None:
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(event)
+            if event.op in (UPDATE, DELETE) and event.previous is not None:
+                for tag in split_tags(event.previous.tags):
+                    self._trie.remove(tag)
+            if event.op in (INSERT, UPDATE) and event.recipe is not None:
+                for tag in split_tags(event.recipe.tags):
+                    self._trie.add(tag)
+
+    def complete(self, prefix: str, limit: Optional[int] = DEFAULT_LIMIT) -> List[Tuple[str, int]]:
+        """Подсказки [(тег, количество рецептов)] для введённого префикса (без учёта регистра)."""
+        with self._lock:
+            return self._trie.complete(prefix.strip().lower(), limit)
+
+    def count(self, tag: str) -> int:
+        with self._lock:
+            return self._trie.count(tag.strip().lower())
+
+    def counts(self) -> Dict[str, int]:
+        """Фасеты: {тег: количество рецептов} по всему каталогу."""
+        with self._lock:
+            return dict(self._trie.items())
+
+    def __len__(self) -> int:
+        return len(self._trie)
+
+    def close(self) -> None:
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
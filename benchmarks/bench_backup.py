@@ -0,0 +1,96 @@
+# benchmarks/bench_backup.py
+"""
+Влияние онлайн-копии на задержку запросов.
+
+    python benchmarks/bench_backup.py                  # ~100 МБ БД
+    python benchmarks/bench_backup.py --size 400000 --pages 256 --pause 0.005
+
+Пока в фоне снимается копия, основной поток вызывает get() и меряет задержку.
+Сравниваются: без копии, копия одним шагом (pages=-1) и шагами с паузами.
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.backup import backup  # noqa: E402
+from app.models import RecipeDB, Recipe  # noqa: E402
+
+
+def fill(db: RecipeDB, size: int) -> None:
+    now = Recipe.now()
+    batch = 10000
+    for start in range(0, size, batch):
+        db.seed([Recipe(None, f"Рецепт {i}", "мука, яйца, молоко " * 10, "смешать и испечь " * 10,
+                        "десерт,быстро", now) for i in range(start, min(size, start + batch))])
+
+
+def percentile(values, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def measure(db: RecipeDB, size: int, stop: threading.Event, min_calls: int = 2000):
+    rnd = random.Random(0)
+    latencies = []
+    while not stop.is_set() or len(latencies) < min_calls:
+        t = time.perf_counter()
+        db.get(rnd.randrange(1, size + 1))
+        latencies.append(time.perf_counter() - t)
+    return latencies
+
+
+def run(db: RecipeDB, size: int, dest: str, pages: int, pause: float, label: str) -> None:
+    stop = threading.Event()
+    result = {}
+
+    def worker():
+        if pages:
+            started = time.perf_counter()
+            backup(db, dest, pages=pages, pause=pause)
+            result["duration"] = time.perf_counter() - started
+        else:
+            time.sleep(1.0)
+        stop.set()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    latencies = measure(db, size, stop)
+    thread.join()
+    duration = f"копия {result['duration']:.2f} с" if "duration" in result else "без копии"
+    print(f"{label:<28} {duration:<16} get: p50 {percentile(latencies, 0.5) * 1e6:7.1f} мкс  "
+          f"p99 {percentile(latencies, 0.99) * 1e6:8.1f} мкс  max {max(latencies) * 1e3:7.2f} мс")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=200000)
+    parser.add_argument("--pages", type=int, default=256)
+    parser.add_argument("--pause", type=float, default=0.005)
+    args = parser.parse_args(argv)
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench-backup-")
+    db = RecipeDB(os.path.join(tmp_dir, "recipes.db"))
+    try:
+        fill(db, args.size)
+        stats = db.storage_stats()
+        print(f"БД: {args.size} рецептов, {stats['page_count'] * stats['page_size'] / 2 ** 20:.0f} МБ")
+        dest = os.path.join(tmp_dir, "copy.db")
+        run(db, args.size, dest, 0, 0, "фон")
+        run(db, args.size, dest, -1, 0, "одним шагом")
+        run(db, args.size, dest, args.pages, args.pause, f"по {args.pages} стр., пауза {args.pause}")
+    finally:
+        db.close()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_db.py
+"""
+Микробенчмарк накладных расходов на вызов методов хранилища.
+
+    python benchmarks/bench_db.py                  # RecipeDB, 10 000 рецептов
+    python benchmarks/bench_db.py --size 100000 --stores sqlite,cached,memory,sharded
+
+Для каждого метода печатается лучшее из --repeat среднее время вызова (мкс).
+"""
+
+import argparse
+import datetime
+import os
+import random
+import shutil
+import sys
+import tempfile
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.models import RecipeDB, Recipe  # noqa: E402
+from app.memory_store import MemoryRecipeDB, CachedRecipeDB  # noqa: E402
+from app.sharding import ShardedRecipeDB  # noqa: E402
+
+TAGS = ["десерт", "завтрак", "обед", "ужин", "быстро", "суп", "веган", "выпечка"]
+
+
+def make_store(kind: str, path: str):
+    if kind == "sqlite":
+        return RecipeDB(path)
+    if kind == "cached":
+        return CachedRecipeDB(RecipeDB(path))
+    if kind == "memory":
+        return MemoryRecipeDB()
+    if kind == "sharded":
+        return ShardedRecipeDB(path + ".shards")
+    raise ValueError(kind)
+
+
+def fill(store, size: int) -> None:
+    rnd = random.Random(0)
+    now = Recipe.now()
+    store.seed([
+        Recipe(None, f"Рецепт {i}", "мука, яйца, молоко", "смешать и испечь",
+               ",".join(rnd.sample(TAGS, 2)), now - datetime.timedelta(minutes=rnd.randrange(525600)))
+        for i in range(size)
+    ])
+
+
+def cases(store, size: int):
+    rnd = random.Random(1)
+    now = Recipe.now()
+    week_ago = now - datetime.timedelta(days=7)
+    return [
+        ("get", lambda: store.get(rnd.randrange(1, size + 1))),
+        ("list_all(limit=20)", lambda: store.list_all(limit=20)),
+        ("find_by_tag", lambda: store.find_by_tag("выпечка")),
+        ("list_between(7 дней, limit=50)", lambda: store.list_between(week_ago, now, limit=50)),
+        ("count_by_day(limit=30)", lambda: store.count_by_day(limit=30)),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--stores", default="sqlite")
+    parser.add_argument("--number", type=int, default=2000, help="вызовов в одном замере")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench-db-")
+    try:
+        for kind in args.stores.split(","):
+            store = make_store(kind, os.path.join(tmp_dir, f"{kind}.db"))
+            fill(store, args.size)
+            print(f"== {kind}, {args.size} рецептов")
+            for name, call in cases(store, args.size):
+                number = args.number if not name.startswith("find_by_tag") else max(1, args.number // 100)
+                best = min(timeit.repeat(call, number=number, repeat=args.repeat)) / number
+                print(f"   {name:<32} {best * 1e6:10.1f} мкс")
+            store.close()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
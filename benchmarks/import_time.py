@@ -0,0 +1,108 @@
+# benchmarks/import_time.py
+"""
+Профиль холодного старта точек входа.
+
+    python benchmarks/import_time.py                 # -X importtime для app.main и web.main
+    python benchmarks/import_time.py --top 25 web.main
+    python benchmarks/import_time.py --first-window  # время до первого показа окна GUI
+
+Каждый замер выполняется в отдельном интерпретаторе, чтобы кэш модулей
+не искажал результат.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TARGETS = ["app.main", "web.main"]
+
+# строка вывода -X importtime: "import time:       123 |        456 |   package.module"
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+FIRST_WINDOW_SNIPPET = """
+import time
+t0 = time.perf_counter()
+from PySide6.QtCore import QEventLoop
+from PySide6.QtWidgets import QApplication
+from app.models import RecipeDB
+from app.controllers import RecipeController
+from app.gui import ModernMainWindow
+app = QApplication([])
+t_import = time.perf_counter()
+mw = ModernMainWindow(controller=RecipeController(db=RecipeDB(":memory:")))
+marks = {}
+# момент первой отрисовки фиксируется до отложенной работы окна (график, словарь тегов)
+mw.first_painted.connect(lambda: marks.setdefault("window", time.perf_counter()))
+mw.show()
+while "window" not in marks and time.perf_counter() - t0 < 30:
+    app.processEvents(QEventLoop.AllEvents, 50)
+t_window = marks.get("window", float("nan"))
+print(f"{(t_import - t0) * 1000:.1f} {(t_window - t0) * 1000:.1f}")
+"""
+
+
+def import_profile(module: str) -> List[Tuple[int, int, int, str]]:
+    """Запускает `python -X importtime -c "import module"`, возвращает (self_us, cumulative_us, depth, name)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Не удалось импортировать {module}:\n{proc.stderr.strip().splitlines()[-1]}")
+    entries = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            entries.append((int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2, m.group(4)))
+    return entries
+
+
+def report_imports(module: str, top: int) -> None:
+    entries = import_profile(module)
+    total = next((cum for _, cum, _, name in entries if name == module), 0)
+    print(f"== {module}: {total / 1000:.1f} ms, модулей загружено: {len(entries)}")
+    # только пакеты верхнего уровня вложенности — чтобы время не считалось дважды
+    roots = sorted((e for e in entries if e[2] <= 1), key=lambda e: e[1], reverse=True)
+    for self_us, cum_us, _, name in roots[:top]:
+        print(f"   {cum_us / 1000:9.1f} ms  (self {self_us / 1000:7.1f} ms)  {name}")
+
+
+def report_first_window(runs: int) -> None:
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    samples = []
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, "-c", FIRST_WINDOW_SNIPPET],
+                              cwd=ROOT, env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip())
+        t_import, t_window = map(float, proc.stdout.split()[-2:])
+        samples.append((t_import, t_window))
+    samples.sort(key=lambda s: s[1])
+    t_import, t_window = samples[len(samples) // 2]
+    print(f"== первое окно (медиана из {runs}): импорт {t_import:.1f} ms, окно показано через {t_window:.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=DEFAULT_TARGETS)
+    parser.add_argument("--top", type=int, default=15, help="сколько самых тяжёлых импортов показать")
+    parser.add_argument("--first-window", action="store_true", help="замерить время до показа окна GUI")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.first_window:
+        report_first_window(args.runs)
+        return
+    for module in args.modules:
+        try:
+            report_imports(module, args.top)
+        except RuntimeError as e:
+            print(e)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+# benchmarks/loadtest.py
+"""
+Нагрузочный тест веб-версии (web.main:app) без внешних сервисов.
+
+    python benchmarks/loadtest.py --db-size 10000 --rps 200 --duration 20
+    python benchmarks/loadtest.py --mix index=50,add=20,random=30 --serve
+    python benchmarks/loadtest.py --url http://127.0.0.1:8000 --db recipes_copy.db
+
+Режимы:
+- по умолчанию приложение вызывается в этом же процессе через httpx.ASGITransport
+  (startup/shutdown-обработчики запускаются через lifespan_context, как в uvicorn);
+- --serve поднимает uvicorn на localhost в отдельном процессе;
+- --url бьёт по уже запущенному серверу (--db должен указывать на его БД для замера блокировок).
+
+Нагрузка открытая: запросы стартуют с частотой --rps независимо от ответов
+(не больше --concurrency одновременно). Параллельно поток-зонд берёт
+блокировку записи SQLite (BEGIN IMMEDIATE) и меряет, сколько ждал.
+"""
+
+import argparse
+import asyncio
+import datetime
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.models import RecipeDB, Recipe  # noqa: E402
+
+TAGS = ["десерт", "завтрак", "обед", "ужин", "быстро", "суп", "веган", "выпечка", "напиток", "салат"]
+WORDS = ["пирог", "суп", "салат", "каша", "омлет", "рагу", "паста", "блины", "котлеты", "плов",
+         "домашний", "быстрый", "летний", "острый", "сырный", "овощной", "мясной", "сладкий"]
+INGREDIENTS = ["мука", "яйца", "молоко", "сахар", "соль", "масло", "рис", "картофель", "лук",
+               "морковь", "курица", "говядина", "сыр", "томаты", "огурцы", "чеснок", "перец"]
+
+
+# -----------------------
+# Подготовка данных
+# -----------------------
+def fake_recipe(rnd: random.Random, created_at: datetime.datetime) -> Recipe:
+    # уникальный номер в названии и ингредиентах, чтобы индекс дубликатов не отклонял рецепты
+    uid = rnd.randrange(10 ** 9)
+    return Recipe(
+        id=None,
+        title=" ".join(rnd.sample(WORDS, 2)) + f" №{uid}",
+        ingredients=", ".join(rnd.sample(INGREDIENTS, rnd.randint(3, 7)) + [f"специи №{uid}"]),
+        steps="Смешать, приготовить, подать.",
+        tags=",".join(rnd.sample(TAGS, rnd.randint(1, 3))),
+        created_at=created_at
+    )
+
+
+def seed_db(path: str, size: int, seed: int = 0) -> None:
+    db = RecipeDB(path)
+    rnd = random.Random(seed)
+    now = Recipe.now()
+    batch = 10000
+    for start in range(0, size, batch):
+        db.seed([fake_recipe(rnd, now - datetime.timedelta(seconds=rnd.randrange(365 * 86400)))
+                 for _ in range(min(batch, size - start))])
+    db.close()
+
+
+# -----------------------
+# Зонд блокировок SQLite
+# -----------------------
+class LockProbe(threading.Thread):
+    """Раз в interval секунд берёт и сразу отпускает блокировку записи, записывая время ожидания."""
+
+    def __init__(self, db_path: str, interval: float = 0.05):
+        super().__init__(name="lock-probe", daemon=True)
+        self.db_path = db_path
+        self.interval = interval
+        self.waits: List[float] = []
+        self.timeouts = 0
+        self._halt = threading.Event()
+
+    def run(self) -> None:
+        conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+        try:
+            while not self._halt.wait(self.interval):
+                started = time.perf_counter()
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    conn.execute("ROLLBACK")
+                    self.waits.append(time.perf_counter() - started)
+                except sqlite3.OperationalError:
+                    self.timeouts += 1
+        finally:
+            conn.close()
+
+    def stop(self) -> None:
+        self._halt.set()
+        self.join()
+
+
+# -----------------------
+# Генератор нагрузки
+# -----------------------
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ("index", "add", "random"):
+            raise argparse.ArgumentTypeError(f"Неизвестный тип запроса: {name}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+async def one_request(client, kind: str, rnd: random.Random):
+    if kind == "index":
+        return await client.get("/")
+    if kind == "add":
+        recipe = fake_recipe(rnd, Recipe.now())
+        return await client.post("/add", data={
+            "title": recipe.title, "ingredients": recipe.ingredients,
+            "steps": recipe.steps, "tags": recipe.tags
+        }, headers={"X-Requested-With": "fetch"})
+    return await client.get("/random", params={"tag": rnd.choice(TAGS)})
+
+
+async def generate_load(client, mix: Dict[str, float], rps: float, duration: float,
+                        concurrency: int, seed: int = 0):
+    rnd = random.Random(seed)
+    kinds, weights = list(mix), list(mix.values())
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    locked = 0
+    slots = asyncio.Semaphore(concurrency)
+    dropped = 0
+
+    async def fire(kind: str):
+        nonlocal locked
+        started = time.perf_counter()
+        try:
+            resp = await one_request(client, kind, rnd)
+            if resp.status_code >= 400:
+                errors[kind] += 1
+                if "database is locked" in resp.text:
+                    locked += 1
+        except Exception as e:
+            errors[kind] += 1
+            if "database is locked" in str(e):
+                locked += 1
+        finally:
+            latencies[kind].append(time.perf_counter() - started)
+            slots.release()
+
+    tasks = []
+    started = time.perf_counter()
+    n = 0
+    while True:
+        # открытая модель: n-й запрос стартует в момент n / rps
+        target = started + n / rps
+        now = time.perf_counter()
+        if target - started >= duration:
+            break
+        if target > now:
+            await asyncio.sleep(target - now)
+        n += 1
+        if slots.locked():
+            dropped += 1
+            continue
+        await slots.acquire()
+        tasks.append(asyncio.ensure_future(fire(rnd.choices(kinds, weights)[0])))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    return latencies, errors, locked, dropped, elapsed
+
+
+# -----------------------
+# Отчёт
+# -----------------------
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def print_report(latencies, errors, locked, dropped, elapsed, probe: Optional[LockProbe]) -> None:
+    total = sum(len(v) for v in latencies.values())
+    total_errors = sum(errors.values())
+    print(f"запросов: {total} за {elapsed:.1f} с, пропускная способность {total / elapsed:.1f} req/s")
+    print(f"ошибок: {total_errors} ({100 * total_errors / max(total, 1):.2f}%), "
+          f"'database is locked': {locked}, не отправлено (лимит параллельности): {dropped}")
+    print(f"{'запрос':<8} {'n':>7} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9} {'ошибок':>7}")
+    rows = dict(latencies)
+    rows["всего"] = [x for v in latencies.values() for x in v]
+    for kind, values in rows.items():
+        values = sorted(values)
+        err = total_errors if kind == "всего" else errors.get(kind, 0)
+        print(f"{kind:<8} {len(values):>7} "
+              + " ".join(f"{percentile(values, q) * 1000:>9.1f}" for q in (0.5, 0.9, 0.99))
+              + f" {(values[-1] if values else 0) * 1000:>9.1f} {err:>7}")
+    if probe is not None:
+        waits = sorted(probe.waits)
+        print(f"ожидание блокировки записи SQLite: p50 {percentile(waits, 0.5) * 1000:.2f} ms, "
+              f"p99 {percentile(waits, 0.99) * 1000:.2f} ms, max {(waits[-1] if waits else 0) * 1000:.2f} ms, "
+              f"замеров {len(waits)}, таймаутов {probe.timeouts}")
+
+
+# -----------------------
+# Точка входа
+# -----------------------
+async def run_in_process(args) -> tuple:
+    import httpx
+    os.environ["RECIPES_DB"] = args.db
+    from web.main import app
+    transport = httpx.ASGITransport(app=app)
+    # ASGITransport не шлёт lifespan: без этого не стартуют предзагрузка индексов, обслуживание и копии
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            return await generate_load(client, args.mix, args.rps, args.duration, args.concurrency, args.seed)
+
+
+async def run_over_http(args, url: str) -> tuple:
+    import httpx
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30.0) as client:
+        return await generate_load(client, args.mix, args.rps, args.duration, args.concurrency, args.seed)
+
+
+def wait_for_server(url: str, timeout: float = 15.0) -> None:
+    import httpx
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            # /events отвечает заголовками сразу и не трогает БД
+            with httpx.stream("GET", url + "/events", timeout=1.0):
+                return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Сервер {url} не ответил за {timeout} с")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="файл БД (по умолчанию — временный, заполняется до --db-size)")
+    parser.add_argument("--db-size", type=int, default=1000, help="сколько рецептов сгенерировать")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("index=60,add=10,random=30"),
+                        help="доли запросов, например index=60,add=10,random=30")
+    parser.add_argument("--rps", type=float, default=50.0)
+    parser.add_argument("--duration", type=float, default=10.0, help="секунды")
+    parser.add_argument("--concurrency", type=int, default=64, help="максимум одновременных запросов")
+    parser.add_argument("--url", help="адрес запущенного сервера вместо вызова в процессе")
+    parser.add_argument("--serve", action="store_true", help="запустить uvicorn на localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-lock-probe", action="store_true")
+    args = parser.parse_args(argv)
+
+    tmp_dir = None
+    if args.db is None:
+        tmp_dir = tempfile.mkdtemp(prefix="loadtest-")
+        args.db = os.path.join(tmp_dir, "recipes.db")
+        print(f"заполняю {args.db}: {args.db_size} рецептов...")
+        seed_db(args.db, args.db_size, args.seed)
+
+    probe = None if args.no_lock_probe else LockProbe(args.db)
+    server = None
+    try:
+        if args.serve:
+            env = dict(os.environ, RECIPES_DB=args.db)
+            server = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "web.main:app", "--port", str(args.port), "--log-level", "warning"],
+                cwd=ROOT, env=env
+            )
+            args.url = f"http://127.0.0.1:{args.port}"
+            wait_for_server(args.url)
+        if probe is not None:
+            probe.start()
+        if args.url:
+            result = asyncio.run(run_over_http(args, args.url))
+        else:
+            result = asyncio.run(run_in_process(args))
+    finally:
+        if probe is not None and probe.is_alive():
+            probe.stop()
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    print_report(*result, probe)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import pytest
+from app.models import RecipeDB
+from app.memory_store import MemoryRecipeDB, CachedRecipeDB
+from app.sharding import ShardedRecipeDB
+
+
+@pytest.fixture(params=["sqlite", "memory", "cached", "sharded"])
+def store(request, tmp_path):
+    """Одно и то же хранилище рецептов в четырёх реализациях RecipeStore."""
+    if request.param == "sqlite":
+        db = RecipeDB(str(tmp_path / "test.db"))
+    elif request.param == "memory":
+        db = MemoryRecipeDB()
+    elif request.param == "sharded":
+        db = ShardedRecipeDB(str(tmp_path / "shards"), shards=3)
+    else:
+        db = CachedRecipeDB(RecipeDB(str(tmp_path / "test.db")))
+    yield db
+    db.close()
@@ -0,0 +1,58 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.analytics import ActivityAnalytics, DAY, WEEK, MONTH
+from app.models import Recipe
+
+
+@pytest.fixture
+def analytics(store):
+    db = store
+    db.seed([
+        Recipe(None, "A", "", "", "Десерт, быстро", "2025-11-03T09:00:00"),  # понедельник
+        Recipe(None, "B", "", "", "десерт", "2025-11-03T18:00:00"),
+        Recipe(None, "C", "", "", "обед", "2025-11-05T12:00:00"),
+        Recipe(None, "D", "", "", "", "2025-12-01T08:00:00"),
+    ])
+    return ActivityAnalytics(db)
+
+
+def test_daily_histogram_includes_empty_days(analytics):
+    labels, counts = analytics.histogram(DAY)
+    assert str(labels[0]) == "2025-11-03"
+    assert counts[:3].tolist() == [2, 0, 1]
+    assert counts.sum() == 4
+
+
+def test_weekly_and_monthly_histograms(analytics):
+    labels, counts = analytics.histogram(WEEK)
+    assert str(labels[0]) == "2025-11-03"
+    assert counts[0] == 3
+    labels, counts = analytics.histogram(MONTH)
+    assert [str(l) for l in labels] == ["2025-11", "2025-12"]
+    assert counts.tolist() == [3, 1]
+
+
+def test_rolling_mean(analytics):
+    labels, means = analytics.rolling_mean(window=3)
+    assert str(labels[0]) == "2025-11-05"
+    assert means[0] == pytest.approx(1.0)
+
+
+def test_tags(analytics):
+    assert analytics.top_tags(1) == [("десерт", 2)]
+    labels, series = analytics.tag_series(DAY, tags=["Обед"])
+    assert list(series) == ["обед"]
+    assert series["обед"][2] == 1
+
+
+def test_cache_invalidated_on_write(analytics):
+    assert analytics.histogram(MONTH)[1].sum() == 4
+    analytics.db.add(Recipe(None, "E", "", "", "", "2025-12-02T08:00:00"))
+    assert analytics.histogram(MONTH)[1].tolist() == [3, 2]
+
+
+def test_repeated_tag_counts_recipe_once(store):
+    store.add(Recipe(None, "Щи", "", "", "суп, Суп", "2025-12-01T09:00:00"))
+    assert ActivityAnalytics(store).top_tags() == [("суп", 1)]
@@ -0,0 +1,105 @@
+import glob
+import sqlite3
+
+import pytest
+
+from app.backup import BackupError, BackupScheduler, backup, integrity_check, list_backups, main, restore
+from app.models import Recipe, RecipeDB
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = RecipeDB(str(tmp_path / "recipes.db"))
+    db.seed([Recipe(None, f"r{i}", "x" * 500, "", "суп", Recipe.now()) for i in range(200)])
+    yield db
+    db.close()
+
+
+def test_backup_is_consistent_with_writes_between_steps(db, tmp_path):
+    dest = str(tmp_path / "copy.db")
+    added = []
+
+    def write_between_steps(remaining, total):
+        # запись через то же соединение посреди копирования попадает в копию
+        if remaining and not added:
+            added.append(db.add(Recipe(None, "Во время копии", "", "", "", Recipe.now())))
+
+    report = backup(db, dest, pages=2, pause=0, progress=write_between_steps)
+    assert report.pages > 2 and added
+    assert integrity_check(dest) == []
+    copy = RecipeDB(dest)
+    assert len(copy.list_all()) == 201
+    assert copy.get(added[0]).title == "Во время копии"
+    copy.close()
+
+
+def test_integrity_check_reports_broken_file(tmp_path):
+    bad = tmp_path / "bad.db"
+    bad.write_bytes(b"not a database" * 100)
+    assert integrity_check(str(bad))
+    with pytest.raises(BackupError):
+        restore(str(bad), str(tmp_path / "target.db"))
+
+
+def test_scheduler_skips_unchanged_and_rotates(db, tmp_path):
+    backup_dir = tmp_path / "backups"
+    backup_dir.mkdir()
+    for i in range(3):
+        (backup_dir / f"recipes-2020010{i}-000000.db").write_bytes(b"")
+    scheduler = BackupScheduler(db, str(backup_dir), keep=2, pause=0)
+    report = scheduler.run_once()
+    assert report is not None
+    assert list_backups(str(backup_dir)) == [str(backup_dir / "recipes-20200102-000000.db"), report.path]
+    # без записей в БД новая копия не снимается
+    assert scheduler.run_once() is None
+    db.add(Recipe(None, "new", "", "", "", Recipe.now()))
+    assert scheduler.run_once() is not None
+
+
+def test_scheduler_waits_out_interval_after_restart(db, tmp_path):
+    backup_dir = tmp_path / "backups"
+    scheduler = BackupScheduler(db, str(backup_dir), interval=3600, pause=0)
+    assert scheduler.initial_delay() == 0
+    scheduler.run_once()
+    # новый процесс: last_report пуст, но последняя копия в каталоге свежая
+    restarted = BackupScheduler(db, str(backup_dir), interval=3600, pause=0)
+    assert 3500 < restarted.initial_delay() <= 3600
+    restarted.start()
+    restarted.stop(timeout=5)
+    assert len(list_backups(str(backup_dir))) == 1
+    # последняя копия старше интервала — первая снимается сразу
+    old_dir = tmp_path / "old"
+    old_dir.mkdir()
+    (old_dir / "recipes-20200101-000000.db").write_bytes(b"")
+    assert BackupScheduler(db, str(old_dir), interval=3600).initial_delay() == 0
+
+
+def test_stop_interrupts_backup(db, tmp_path):
+    scheduler = BackupScheduler(db, str(tmp_path / "backups"), pages=1, pause=0)
+    scheduler._stop.set()
+    with pytest.raises(BackupError):
+        scheduler.run_once()
+    assert list_backups(str(tmp_path / "backups")) == []
+    assert not list((tmp_path / "backups").iterdir())
+
+
+def test_restore_cli_keeps_previous_db(db, tmp_path, capsys):
+    backup_dir = str(tmp_path / "backups")
+    main(["backup", backup_dir, "--db", db.db_path])
+    [copy] = list_backups(backup_dir)
+    main(["verify", copy])
+    rid = db.add(Recipe(None, "после копии", "", "", "", Recipe.now()))
+
+    main(["restore", copy, "--db", db.db_path])
+    restored = RecipeDB(db.db_path)
+    assert len(restored.list_all()) == 200
+    restored.close()
+    [saved] = glob.glob(db.db_path + ".before-restore-*")
+    before = sqlite3.connect(saved)
+    assert before.execute("SELECT title FROM recipes WHERE id = ?", (rid,)).fetchone() == ("после копии",)
+    before.close()
+    assert "восстановлена" in capsys.readouterr().out
+    # повторное восстановление не затирает сохранённую исходную БД
+    again = restore(copy, db.db_path)
+    assert again != saved
+    assert sorted(glob.glob(db.db_path + ".before-restore-*")) == sorted([saved, again])
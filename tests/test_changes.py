@@ -0,0 +1,49 @@
+from app.changes import ChangeLog, INSERT, UPDATE, DELETE
+from app.controllers import RecipeController
+from app.models import RecipeDB
+
+
+def test_since_returns_events_in_order():
+    log = ChangeLog()
+    log.publish(INSERT, 1)
+    log.publish(DELETE, 1)
+    assert [e.seq for e in log.since(0)] == [1, 2]
+    assert [e.op for e in log.since(1)] == [DELETE]
+    assert log.since(2) == []
+
+
+def test_since_reports_truncated_history():
+    log = ChangeLog(maxlen=2)
+    for rid in range(3):
+        log.publish(INSERT, rid)
+    assert log.since(0) is None
+    assert [e.seq for e in log.since(1)] == [2, 3]
+
+
+def test_since_resets_client_ahead_of_log():
+    # EventSource после перезапуска сервера присылает Last-Event-ID прежнего процесса
+    log = ChangeLog()
+    log.publish(INSERT, 1)
+    assert log.since(500) is None
+    assert log.since(1) == []
+
+
+def test_subscribe_and_unsubscribe():
+    log = ChangeLog()
+    seen = []
+    unsubscribe = log.subscribe(seen.append)
+    log.publish(INSERT, 1)
+    unsubscribe()
+    log.publish(INSERT, 2)
+    assert [e.recipe_id for e in seen] == [1]
+
+
+def test_controller_publishes_changes(tmp_path):
+    ctrl = RecipeController(RecipeDB(str(tmp_path / "changes.db")))
+    rid = ctrl.add_recipe("Каша", "крупа", "варить", "завтрак")
+    ctrl.edit_recipe(rid, "Каша молочная", "крупа, молоко", "варить", "завтрак")
+    ctrl.delete_recipe(rid)
+    events = ctrl.changes.since(0)
+    assert [e.op for e in events] == [INSERT, UPDATE, DELETE]
+    assert events[1].recipe.title == "Каша молочная"
+    assert events[2].recipe is None
@@ -1,13 +1,11 @@
 ﻿import pytest
 from app.controllers import RecipeController
-from app.models import RecipeDB, Recipe, RecipeError, RecipeNotFoundError
+from app.models import Recipe, RecipeError, RecipeNotFoundError
 
 
 @pytest.fixture
-def controller(tmp_path):
-    db_path = tmp_path / "test.db"
-    db = RecipeDB(str(db_path))
-    ctrl = RecipeController(db=db)
+def controller(store):
+    ctrl = RecipeController(db=store)
     return ctrl
 
 
@@ -60,7 +58,7 @@ def test_random_recipe_no_results(controller):
 # tests/test_controllers_extra.py
 import pytest
 from app.controllers import RecipeController
-from app.models import RecipeDB, Recipe, RecipeNotFoundError
+from app.models import Recipe, RecipeNotFoundError
 
 class DummyLogger:
     def __init__(self):
@@ -69,10 +67,9 @@ class DummyLogger:
     def warning(self, msg): self.messages.append(msg)
 
 @pytest.fixture
-def controller_with_logger(tmp_path):
-    db = RecipeDB(str(tmp_path / "db.db"))
+def controller_with_logger(store):
     logger = DummyLogger()
-    return RecipeController(db, logger)
+    return RecipeController(store, logger)
 
 def test_edit_nonexistent_logs_warning(controller_with_logger):
     with pytest.raises(RecipeNotFoundError):
@@ -0,0 +1,84 @@
+import pytest
+from app.controllers import RecipeController
+from app.dedup import DuplicateIndex, features
+from app.models import RecipeDB, Recipe, DuplicateRecipeError
+
+
+def test_features_ignore_whitespace_and_order():
+    a = features("Блины  с мясом", "мука, молоко,яйца")
+    b = features("блины с мясом ", "яйца ,  Мука\nмолоко")
+    assert a == b
+
+
+def test_recipes_without_ingredients_are_not_checked(controller):
+    assert features("Чай", "") == set()
+    controller.add_recipe("Чай", "", "заварить", "")
+    controller.add_recipe("чай", "", "заварить с лимоном", "")
+    assert controller.find_duplicates() == []
+
+
+def test_query_finds_near_duplicates_only():
+    index = DuplicateIndex()
+    index.add(1, "Борщ украинский", "свекла, капуста, картофель, морковь, лук")
+    index.add(2, "Сырники", "творог, яйцо, мука")
+    matches = index.query("борщ  украинский", "лук, морковь, картофель, капуста, свекла")
+    assert [rid for rid, _ in matches] == [1]
+    assert index.query("Оладьи", "кефир, мука") == []
+
+
+def test_find_duplicates_groups():
+    index = DuplicateIndex()
+    index.add(1, "Плов", "рис, баранина, морковь")
+    index.add(2, "плов", "морковь, рис, баранина")
+    index.add(3, "Плов", "баранина,рис,морковь")
+    index.add(4, "Салат", "огурцы, помидоры")
+    index.remove(3)
+    assert index.find_duplicates() == [[1, 2]]
+
+
+@pytest.fixture
+def controller(tmp_path):
+    return RecipeController(RecipeDB(str(tmp_path / "dedup.db")), dedup=DuplicateIndex())
+
+
+def test_add_recipe_rejects_duplicate(controller):
+    rid = controller.add_recipe("Омлет", "яйца, молоко", "жарить", "завтрак")
+    with pytest.raises(DuplicateRecipeError) as exc:
+        controller.add_recipe("омлет", "молоко,  яйца", "жарить", "")
+    assert exc.value.duplicate_of == rid
+    controller.delete_recipe(rid)
+    controller.add_recipe("омлет", "молоко,  яйца", "жарить", "")
+
+
+def test_import_skips_duplicates(controller):
+    existing = controller.add_recipe("Омлет", "яйца, молоко", "жарить", "завтрак")
+    report = controller.import_recipes([
+        Recipe(None, "Омлет ", "молоко, яйца", "", "", Recipe.now()),
+        Recipe(None, "Каша", "крупа, вода", "", "", Recipe.now()),
+        Recipe(None, "каша", "вода, крупа", "", "", Recipe.now()),
+    ])
+    assert len(report.added) == 1
+    assert [dup for _, dup in report.skipped] == [existing, report.added[0]]
+    assert controller.find_duplicates() == []
+
+
+def test_load_matches_incremental_add():
+    recipes = [Recipe(i, f"Рецепт {i % 7}", f"мука, вода, ингредиент {i % 5}", "", "", Recipe.now())
+               for i in range(1, 40)]
+    loaded, added = DuplicateIndex(), DuplicateIndex()
+    loaded.load(recipes, chunk=8)
+    for r in recipes:
+        added.add(r.id, r.title, r.ingredients)
+    assert loaded.find_duplicates() == added.find_duplicates()
+    assert loaded.query("рецепт 3", "вода, мука, ингредиент 3") == added.query("рецепт 3", "вода, мука, ингредиент 3")
+
+
+def test_preload_builds_index_in_background(tmp_path):
+    db = RecipeDB(str(tmp_path / "preload.db"))
+    rid = db.add(Recipe(None, "Омлет", "яйца, молоко", "жарить", "", Recipe.now()))
+    controller = RecipeController(db, dedup=DuplicateIndex())
+    controller.preload().join()
+    assert controller.preload() is None
+    with pytest.raises(DuplicateRecipeError) as exc:
+        controller.add_recipe("омлет", "молоко, яйца", "", "")
+    assert exc.value.duplicate_of == rid
@@ -1,14 +1,11 @@
 import pytest
-from app.models import RecipeDB, Recipe
 from app.controllers import RecipeController
 
 
 @pytest.fixture
-def setup_env(tmp_path):
-    db_path = tmp_path / "integration.db"
-    db = RecipeDB(str(db_path))
-    ctrl = RecipeController(db)
-    return db, ctrl
+def setup_env(store):
+    ctrl = RecipeController(store)
+    return store, ctrl
 
 
 def test_add_edit_delete_flow(setup_env):
@@ -0,0 +1,51 @@
+import datetime
+import pytest
+from app.controllers import RecipeController
+from app.maintenance import MaintenanceScheduler
+from app.models import RecipeDB, Recipe, RecipeNotFoundError
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = RecipeDB(str(tmp_path / "maint.db"))
+    yield db
+    db.close()
+
+
+def test_delete_is_soft_and_restorable(db):
+    ctrl = RecipeController(db)
+    rid = ctrl.add_recipe("Рагу", "овощи", "тушить", "обед")
+    ctrl.delete_recipe(rid)
+    assert db.list_all() == []
+    with pytest.raises(RecipeNotFoundError):
+        ctrl.delete_recipe(rid)
+    ctrl.restore_recipe(rid)
+    assert ctrl.get_recipe(rid).title == "Рагу"
+    assert ctrl.changes.since(0)[-1].op == "insert"
+
+
+def test_purge_respects_retention(db):
+    rid = db.add(Recipe(None, "Старый", "", "", "", Recipe.now()))
+    db.delete(rid)
+    assert db.purge_deleted(Recipe.now() - datetime.timedelta(hours=1)) == 0
+    assert db.purge_deleted(Recipe.now() + datetime.timedelta(seconds=1), batch_size=1) == 1
+    with pytest.raises(RecipeNotFoundError):
+        db.restore(rid)
+
+
+def test_purge_rejects_empty_batch(db):
+    with pytest.raises(ValueError):
+        db.purge_deleted(Recipe.now(), batch_size=0)
+    with pytest.raises(ValueError):
+        MaintenanceScheduler(db.db_path, batch_size=0)
+
+
+def test_run_once_reclaims_space(db):
+    db.seed([Recipe(None, f"r{i}", "x" * 2000, "", "", Recipe.now()) for i in range(300)])
+    for recipe in db.list_all():
+        db.delete(recipe.id)
+    scheduler = MaintenanceScheduler(db.db_path, retention=datetime.timedelta(seconds=-1), batch_size=100)
+    report = scheduler.run_once()
+    assert report.purged == 300
+    assert report.reclaimed_bytes > 0
+    assert db.storage_stats()["freelist_count"] == 0
@@ -0,0 +1,54 @@
+from app.memory_store import MemoryRecipeDB, CachedRecipeDB
+from app.models import RecipeDB, Recipe
+
+
+def test_memory_find_by_tag_uses_normalized_tags():
+    db = MemoryRecipeDB()
+    db.seed([
+        Recipe(None, "Торт", "", "", "Десерт, праздник", "2025-11-01T10:00:00"),
+        Recipe(None, "Суп", "", "", "обед", "2025-11-02T10:00:00"),
+    ])
+    assert [r.title for r in db.find_by_tag("десерт")] == ["Торт"]
+    db.update(1, "Торт", "", "", "обед")
+    assert [r.title for r in db.find_by_tag("обед")] == ["Суп", "Торт"]
+    assert db.find_by_tag("десерт") == []
+
+
+def test_memory_returns_copies():
+    db = MemoryRecipeDB()
+    rid = db.add(Recipe(None, "Чай", "", "", "", Recipe.now()))
+    db.get(rid).title = "Кофе"
+    assert db.get(rid).title == "Чай"
+
+
+def test_cached_reloads_after_foreign_write(tmp_path):
+    path = str(tmp_path / "cached.db")
+    cached = CachedRecipeDB(RecipeDB(path))
+    cached.add(Recipe(None, "Свой", "", "", "", Recipe.now()))
+    assert len(cached.list_all()) == 1
+
+    other = RecipeDB(path)
+    other.add(Recipe(None, "Чужой", "", "", "", Recipe.now()))
+    other.close()
+    assert {r.title for r in cached.list_all()} == {"Свой", "Чужой"}
+    cached.close()
+
+
+def test_cached_reloads_after_foreign_write_before_own(tmp_path):
+    path = str(tmp_path / "cached.db")
+    backing = RecipeDB(path)
+    cached = CachedRecipeDB(backing)
+    assert cached.list_all() == []
+    own_add = backing.add
+
+    def add_after_foreign(recipe):
+        # чужая запись попадает между _fresh() и своей записью
+        other = RecipeDB(path)
+        other.add(Recipe(None, "Чужой", "", "", "", Recipe.now()))
+        other.close()
+        return own_add(recipe)
+
+    backing.add = add_after_foreign
+    cached.add(Recipe(None, "Свой", "", "", "", Recipe.now()))
+    assert {r.title for r in cached.list_all()} == {"Свой", "Чужой"}
+    cached.close()
@@ -1,18 +1,13 @@
-﻿import os
-import tempfile
+﻿import sqlite3
+import datetime
 import pytest
 from app.models import RecipeDB, Recipe, RecipeError, RecipeNotFoundError
 
 
 @pytest.fixture
-def temp_db():
-    """Создает временную БД для тестов"""
-    fd, path = tempfile.mkstemp(suffix=".db")
-    os.close(fd)
-    db = RecipeDB(db_path=path)
-    yield db
-    db.close()
-    os.remove(path)
+def temp_db(store):
+    """Хранилище для тестов (SQLite, память и кэш — см. conftest.py)"""
+    return store
 
 
 def test_add_and_get_recipe(temp_db):
@@ -73,3 +68,123 @@ def test_count_by_date(temp_db):
     stats = temp_db.count_by_date()
     assert stats["2025-11-04"] == 2
     assert stats["2025-11-03"] == 1
+
+
+def test_created_at_is_datetime(temp_db):
+    rid = temp_db.add(Recipe(None, "Дата", "x", "y", "z", "2025-11-04T10:00:00"))
+    fetched = temp_db.get(rid)
+    assert fetched.created_at == datetime.datetime(2025, 11, 4, 10, 0, 0)
+
+
+def test_list_between_and_count_by_day(temp_db):
+    temp_db.seed([
+        Recipe(None, "A", "1", "2", "x", "2025-11-01T10:00:00"),
+        Recipe(None, "B", "1", "2", "x", "2025-11-03T12:00:00"),
+        Recipe(None, "C", "1", "2", "x", "2025-11-05T09:00:00"),
+    ])
+    found = temp_db.list_between(datetime.datetime(2025, 11, 2), datetime.datetime(2025, 11, 5, 9))
+    assert [r.title for r in found] == ["B"]
+    assert [r.title for r in temp_db.list_all()] == ["C", "B", "A"]
+    days = temp_db.count_by_day(limit=2)
+    assert list(days) == [datetime.date(2025, 11, 3), datetime.date(2025, 11, 5)]
+
+
+def test_migrates_legacy_text_created_at(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.execute("""
+    CREATE TABLE recipes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        ingredients TEXT,
+        steps TEXT,
+        tags TEXT,
+        created_at TEXT
+    )""")
+    conn.execute("INSERT INTO recipes(title, ingredients, steps, tags, created_at) "
+                 "VALUES ('Старый', 'a', 'b', 'c', '2025-11-04T12:34:56')")
+    conn.commit()
+    conn.close()
+
+    db = RecipeDB(path)
+    [recipe] = db.list_all()
+    assert recipe.created_at == datetime.datetime(2025, 11, 4, 12, 34, 56)
+    assert db.count_by_date() == {"2025-11-04": 1}
+    db.close()
+
+
+def test_enables_incremental_auto_vacuum_on_open(tmp_path):
+    # v2 уже записана, а VACUUM миграции не дошёл до конца: режим включается при открытии
+    path = str(tmp_path / "v2.db")
+    RecipeDB(path).close()
+    conn = sqlite3.connect(path)
+    conn.executescript("PRAGMA auto_vacuum = NONE; VACUUM;")
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+    conn.close()
+
+    db = RecipeDB(path)
+    assert db.conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    assert db.conn.execute("PRAGMA user_version").fetchone()[0] == 2
+    db.close()
+
+
+def test_streaming_read_does_not_block_other_writers(tmp_path):
+    path = str(tmp_path / "wal.db")
+    db = RecipeDB(path)
+    db.seed([Recipe(None, f"R{i}", "a", "b", "c", Recipe.now()) for i in range(100)])
+    rows = db.iter_all(("id",), chunk=10)
+    next(rows)
+    other = sqlite3.connect(path, timeout=0.1)
+    other.execute("INSERT INTO recipes(title, created_at) VALUES ('Чужой', 0)")
+    other.commit()
+    other.close()
+    assert len(list(rows)) == 99
+    db.close()
+
+
+def test_version_changes_on_write(temp_db):
+    v0 = temp_db.version
+    rid = temp_db.add(Recipe(None, "V", "x", "y", "z", Recipe.now_iso()))
+    v1 = temp_db.version
+    assert v1 != v0
+    temp_db.get(rid)
+    assert temp_db.version == v1
+
+
+def test_reads_from_other_thread(tmp_path):
+    import threading
+    db = RecipeDB(str(tmp_path / "t.db"))
+    rid = db.add(Recipe(None, "Поток", "x", "y", "z", Recipe.now_iso()))
+    result = {}
+    t = threading.Thread(target=lambda: result.update(r=db.get(rid), all=db.list_all(limit=5)))
+    t.start()
+    t.join()
+    # у каждого потока свой курсор, а чтение в основном потоке не сбито
+    assert result["r"].title == "Поток"
+    assert [r.id for r in result["all"]] == [rid]
+    assert db.get(rid).title == "Поток"
+    db.close()
+
+
+def test_iter_all_streams_and_projects(temp_db):
+    ids = temp_db.add_many([Recipe(None, f"R{i}", "x", "y", "суп" if i % 2 else "десерт",
+                                   f"2025-01-0{i + 1}T10:00:00") for i in range(5)])
+    assert [r.id for r in temp_db.iter_all()] == [r.id for r in temp_db.list_all()] == ids[::-1]
+    assert [r.id for r in temp_db.iter_by_tag("суп")] == [r.id for r in temp_db.find_by_tag("суп")]
+    rows = list(temp_db.iter_all(columns=("id", "created_at")))
+    assert rows[0] == (ids[-1], datetime.datetime(2025, 1, 5, 10, 0))
+    assert list(temp_db.iter_by_tag("десерт", ["title"])) == [("R4",), ("R2",), ("R0",)]
+    with pytest.raises(RecipeError):
+        temp_db.iter_all(columns=("id; DROP TABLE recipes",))
+
+
+def test_iter_all_survives_writes_during_iteration(tmp_path):
+    db = RecipeDB(str(tmp_path / "it.db"))
+    db.seed([Recipe(None, f"R{i}", "x", "y", "z", Recipe.now_iso()) for i in range(20)])
+    seen = 0
+    for recipe in db.iter_all(chunk=3):
+        db.update(recipe.id, recipe.title + "!", "x", "y", "z")
+        seen += 1
+    assert seen == 20
+    assert all(r.title.endswith("!") for r in db.list_all())
+    db.close()
@@ -0,0 +1,94 @@
+import datetime
+
+import pytest
+
+from app.models import Recipe, RecipeDB, RecipeError, RecipeNotFoundError
+from app.sharding import ShardedRecipeDB, reshard, main
+
+
+def make_recipes(n):
+    base = datetime.datetime(2025, 3, 1, 12, 0)
+    return [Recipe(None, f"R{i}", "x", "y", "суп" if i % 3 == 0 else "десерт",
+                   base + datetime.timedelta(hours=7 * (i % 10))) for i in range(n)]
+
+
+def test_routes_by_id_and_merges_like_single_db(tmp_path):
+    single = RecipeDB(str(tmp_path / "one.db"))
+    sharded = ShardedRecipeDB(str(tmp_path / "shards"), shards=3)
+    recipes = make_recipes(30)
+    single.add_many(recipes)
+    ids = sharded.add_many(recipes)
+    assert ids == list(range(1, 31))
+    for rid in ids:
+        assert sharded.shards[rid % 3].get(rid).id == rid
+
+    # одинаковые created_at у разных рецептов: порядок решает id, как в одном файле
+    assert [r.id for r in sharded.list_all()] == [r.id for r in single.list_all()]
+    assert [r.id for r in sharded.list_all(limit=7)] == [r.id for r in single.list_all(limit=7)]
+    assert [r.id for r in sharded.find_by_tag("суп")] == [r.id for r in single.find_by_tag("суп")]
+    assert list(sharded.iter_all(("title",))) == list(single.iter_all(("title",)))
+    assert sharded.count_by_day(limit=2) == single.count_by_day(limit=2)
+    assert sharded.count_by_date() == single.count_by_date()
+    single.close()
+    sharded.close()
+
+
+def test_ids_survive_reopen_and_shard_count_is_fixed(tmp_path):
+    root = str(tmp_path / "shards")
+    db = ShardedRecipeDB(root, shards=2)
+    first = db.add(Recipe(None, "A", "", "", "", Recipe.now_iso()))
+    db.close()
+
+    db = ShardedRecipeDB(root)
+    assert len(db.shards) == 2
+    assert db.add(Recipe(None, "B", "", "", "", Recipe.now_iso())) == first + 1
+    db.close()
+    with pytest.raises(RecipeError):
+        ShardedRecipeDB(root, shards=5)
+
+
+def test_reshard_keeps_ids_and_deleted_rows(tmp_path):
+    src = RecipeDB(str(tmp_path / "recipes.db"))
+    ids = src.add_many(make_recipes(12))
+    src.delete(ids[0])
+    src.close()
+
+    two = str(tmp_path / "two")
+    assert reshard(str(tmp_path / "recipes.db"), two, shards=2) == 12
+    five = str(tmp_path / "five")
+    main(["reshard", two, five, "--shards", "5"])
+
+    db = ShardedRecipeDB(five)
+    assert sorted(r.id for r in db.list_all()) == ids[1:]
+    with pytest.raises(RecipeNotFoundError):
+        db.get(ids[0])
+    db.restore(ids[0])
+    assert db.get(ids[0]).title == "R0"
+    assert db.add(Recipe(None, "New", "", "", "", Recipe.now_iso())) == ids[-1] + 1
+    db.close()
+    with pytest.raises(RecipeError):
+        reshard(two, five, shards=3)
+
+
+def test_reshard_rejects_bad_source_without_side_effects(tmp_path, capsys):
+    target = tmp_path / "target"
+    with pytest.raises(RecipeError):
+        reshard(str(tmp_path / "missing.db"), str(target), shards=2)
+    assert not target.exists()
+
+    foreign = tmp_path / "foreign"
+    foreign.mkdir()
+    with pytest.raises(RecipeError):
+        reshard(str(foreign), str(target), shards=2)
+    assert not list(foreign.iterdir()) and not target.exists()
+
+    broken = tmp_path / "broken.db"
+    broken.write_bytes(b"not a database" * 100)
+    with pytest.raises(RecipeError):
+        reshard(str(broken), str(target), shards=2)
+    assert not target.exists()
+
+    with pytest.raises(SystemExit) as exc:
+        main(["reshard", str(foreign), str(target)])
+    assert exc.value.code == 1
+    assert "Ошибка" in capsys.readouterr().err
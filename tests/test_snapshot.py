@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.models import RecipeDB, Recipe
+from app.snapshot import export_snapshot, load_snapshot, SnapshotError
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = RecipeDB(str(tmp_path / "snap.db"))
+    yield db
+    db.close()
+
+
+def test_export_and_load_roundtrip(db, tmp_path):
+    db.seed([
+        Recipe(None, "Борщ", "свекла, капуста", "варить", "обед", "2025-11-03T09:00:00"),
+        Recipe(None, "Сырники", "творог", "жарить", "завтрак,быстро", "2025-11-04T10:00:00"),
+    ])
+    path = str(tmp_path / "snapshot")
+    assert export_snapshot(db, path) == 2
+
+    snap = load_snapshot(path)
+    assert len(snap) == 2
+    assert isinstance(snap.ids, np.memmap)
+    assert list(snap) == db.list_all()
+    assert str(snap.created_at_datetime64[0]) == "2025-11-04T10:00:00"
+
+
+def test_reexport_keeps_open_snapshot_readable(db, tmp_path):
+    path = str(tmp_path / "snapshot")
+    db.add(Recipe(None, "Старый", "", "", "", "2025-11-03T09:00:00"))
+    export_snapshot(db, path)
+    old = load_snapshot(path)
+    db.add(Recipe(None, "Новый", "", "", "", "2025-11-04T09:00:00"))
+    assert export_snapshot(db, path) == 2
+    # открытый снимок читает свою версию, новый — подменённую указателем
+    assert [r.title for r in old] == ["Старый"]
+    assert [r.title for r in load_snapshot(path)] == ["Новый", "Старый"]
+    assert not [name for name in os.listdir(path) if name.endswith(".tmp")]
+
+
+def test_empty_snapshot(db, tmp_path):
+    path = str(tmp_path / "empty")
+    export_snapshot(db, path)
+    assert list(load_snapshot(path)) == []
+
+
+def test_missing_snapshot_raises(tmp_path):
+    with pytest.raises(SnapshotError):
+        load_snapshot(str(tmp_path / "nope"))
+
+
+def test_export_keeps_foreign_files(db, tmp_path):
+    path = tmp_path / "snapshot"
+    db.add(Recipe(None, "Борщ", "", "", "", "2025-11-03T09:00:00"))
+    export_snapshot(db, str(path))
+    (path / "venv").mkdir()
+    (path / "data").mkdir()
+    (path / "data" / "weights.npy").write_bytes(b"w")
+    (path / "v123.tmp").mkdir()  # незаконченная версия другого экспорта
+    export_snapshot(db, str(path))
+    assert (path / "venv").is_dir()
+    assert (path / "data" / "weights.npy").read_bytes() == b"w"
+    assert (path / "v123.tmp").is_dir()
+    assert [r.title for r in load_snapshot(str(path))] == ["Борщ"]
+
+
+def test_export_refuses_foreign_directory(db, tmp_path):
+    (tmp_path / "notes.txt").write_text("x")
+    (tmp_path / "weights.npy").write_bytes(b"w")
+    with pytest.raises(SnapshotError):
+        export_snapshot(db, str(tmp_path))
+    assert (tmp_path / "notes.txt").exists() and (tmp_path / "weights.npy").exists()
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(("v", "CURRENT"))]
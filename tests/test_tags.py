@@ -0,0 +1,88 @@
+from app.changes import ChangeLog, DELETE, INSERT, UPDATE
+from app.controllers import RecipeController
+from app.models import Recipe
+from app.tags import TagTrie, TagIndex
+
+
+def test_trie_complete_orders_by_count():
+    trie = TagTrie()
+    for tag in ["десерт", "десерт", "десерт", "деревенский", "ужин", "десертное"]:
+        trie.add(tag)
+    assert trie.complete("де") == [("десерт", 3), ("деревенский", 1), ("десертное", 1)]
+    assert trie.complete("де", limit=1) == [("десерт", 3)]
+    assert trie.complete("х") == []
+    assert len(trie) == 4
+
+
+def test_trie_remove_prunes_branches():
+    trie = TagTrie()
+    trie.add("суп")
+    trie.add("супы")
+    trie.remove("супы")
+    assert trie.count("супы") == 0
+    assert trie.complete("суп") == [("суп", 1)]
+    trie.remove("суп")
+    trie.remove("нет-такого")
+    assert len(trie) == 0
+    assert trie._root.children == {}
+
+
+def test_controller_tags_follow_writes(store):
+    controller = RecipeController(store)
+    rid = controller.add_recipe("Торт", "мука", "испечь", "Десерт, быстро")
+    controller.add_recipe("Блины", "мука, молоко", "пожарить", "завтрак, быстро")
+    assert controller.suggest_tags("БЫ") == [("быстро", 2)]
+    assert controller.tags.counts() == {"быстро": 2, "десерт": 1, "завтрак": 1}
+
+    controller.edit_recipe(rid, "Торт", "мука", "испечь", "десерт, праздник")
+    assert controller.tags.count("быстро") == 1
+    assert controller.suggest_tags("пр") == [("праздник", 1)]
+
+    controller.delete_recipe(rid)
+    assert controller.suggest_tags("д") == []
+    controller.restore_recipe(rid)
+    assert controller.suggest_tags("д") == [("десерт", 1)]
+
+
+def test_repeated_tag_counts_recipe_once(store):
+    controller = RecipeController(store)
+    rid = controller.add_recipe("Щи", "капуста", "варить", "суп, Суп ,суп")
+    assert controller.suggest_tags("с") == [("суп", 1)]
+    controller.delete_recipe(rid)
+    assert controller.suggest_tags("с") == []
+
+
+def test_tag_index_close_unsubscribes():
+    changes = ChangeLog()
+    index = TagIndex(changes)
+    index.close()
+    changes.publish(INSERT, 1, Recipe(1, "A", "", "", "суп", Recipe.now_iso()))
+    assert len(index) == 0
+
+
+def test_load_keeps_events_published_during_read():
+    changes = ChangeLog()
+    index = TagIndex(changes)
+    now = Recipe.now_iso()
+
+    def rows():
+        yield 1, "суп"
+        yield 2, "салат"
+        # запись 2 уже прочитана в новом виде; 3 и 4 в прочитанные строки не попали
+        changes.publish(UPDATE, 2, Recipe(2, "B", "", "", "салат", now), previous=Recipe(2, "B", "", "", "десерт", now))
+        changes.publish(INSERT, 3, Recipe(3, "C", "", "", "суп, острое", now))
+        changes.publish(DELETE, 1, previous=Recipe(1, "A", "", "", "суп", now))
+        yield 4, "десерт"
+
+    index.load(rows())
+    assert index.counts() == {"суп": 1, "острое": 1, "салат": 1, "десерт": 1}
+    changes.publish(DELETE, 3, previous=Recipe(3, "C", "", "", "суп, острое", now))
+    assert index.counts() == {"салат": 1, "десерт": 1}
+
+
+def test_preload_tags_builds_index_in_background(store):
+    store.add(Recipe(None, "Торт", "", "", "десерт", Recipe.now_iso()))
+    controller = RecipeController(store)
+    controller.preload_tags().join()
+    assert controller.preload_tags() is None
+    assert controller.suggest_tags("д") == [("десерт", 1)]
@@ -1,68 +1,215 @@
-from fastapi import FastAPI, Request, Form
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, Request, Form, Header
+from fastapi.responses import HTMLResponse, StreamingResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
-from app.models import RecipeDB
+from app.models import RecipeDB, RecipeError, DuplicateRecipeError
 from app.controllers import RecipeController
+from app.dedup import DuplicateIndex
+from app.maintenance import MaintenanceScheduler
+from app.backup import BackupScheduler
+from functools import lru_cache
+from typing import AsyncIterator, Iterable, Iterator, Optional
+import asyncio
 import json
+import logging
 import os
 
 app = FastAPI()
 templates = Jinja2Templates(directory="web/templates")
 
 # Создаём глобальные объекты (БД и контроллер)
-db_path = os.path.join(os.path.dirname(__file__), "..", "recipes.db")
+# путь к БД можно переопределить переменной окружения (нагрузочные тесты, стенды)
+db_path = os.environ.get("RECIPES_DB") or os.path.join(os.path.dirname(__file__), "..", "recipes.db")
 db = RecipeDB(db_path)
-controller = RecipeController(db=db)
+controller = RecipeController(db=db, dedup=DuplicateIndex())
+maintenance = MaintenanceScheduler(db_path, logger=logging.getLogger("maintenance"))
+# резервные копии по расписанию — рядом с БД, если каталог не задан явно
+backup_dir = os.environ.get("RECIPES_BACKUP_DIR") or os.path.join(os.path.dirname(db_path), "backups")
+backups = BackupScheduler(db, backup_dir, logger=logging.getLogger("backup"))
+
+# Размер куска, отдаваемого клиенту при потоковой отрисовке страницы
+STREAM_CHUNK_SIZE = 16 * 1024
+
+# Максимум подсказок тегов за один запрос /api/tags
+TAGS_MAX_LIMIT = 50
+
+# Интервал пустых сообщений SSE, чтобы прокси не закрывали соединение
+SSE_HEARTBEAT = 15.0
+
+# Фрагмент графика зависит только от данных: {"version": версия БД, "html": ...}
+_chart_cache = {"version": None, "html": ""}
+
+
+@app.on_event("startup")
+def start_maintenance():
+    maintenance.start()
+    backups.start()
+
+@app.on_event("startup")
+def load_tags():
+    # словарь тегов строится в фоне при старте, а не на первом нажатии клавиши
+    controller.preload_tags()
+
+@app.on_event("startup")
+def preload_dedup():
+    # индекс дубликатов строится в фоне: старт сервера и первый /add его не ждут
+    controller.preload()
+
+@app.on_event("shutdown")
+def stop_maintenance():
+    # незаконченная копия прерывается на ближайшем шаге
+    backups.stop(timeout=5)
+    maintenance.stop(timeout=5)
+
+
+@lru_cache(maxsize=None)
+def _head_fragment() -> str:
+    """Шапка, стили и формы — статичны, рендерятся один раз."""
+    return templates.get_template("index_head.html").render()
+
+
+def _head(add_error: Optional[str] = None) -> str:
+    """Шапка; с сообщением об ошибке добавления рендерится заново (без fetch)."""
+    if not add_error:
+        return _head_fragment()
+    return templates.get_template("index_head.html").render(add_error=add_error)
+
+
+def _chart_fragment() -> str:
+    """График активности перерисовывается только после записи в БД."""
+    version = db.version
+    if _chart_cache["version"] != version:
+        stats = controller.activity_stats() or {}
+        _chart_cache["html"] = templates.get_template("index_chart.html").render(stats_json=json.dumps(stats))
+        _chart_cache["version"] = version
+    return _chart_cache["html"]
+
+
+def _index_body(random_recipe) -> Iterator[str]:
+    yield templates.get_template("index_random.html").render(random_recipe=random_recipe)
+    # номер события берётся до чтения строк: клиент подпишется на /events с этого места
+    seq = controller.changes.last_seq
+    # строки таблицы отдаются по мере рендеринга, страница целиком в памяти не собирается
+    yield from templates.get_template("index_rows.html").generate(recipes=controller.iter_all(), seq=seq)
+    yield _chart_fragment()
+
+
+def _buffered(parts: Iterable[str], size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Склеивает мелкие куски generate() в блоки ~size байт."""
+    buf, buffered = [], 0
+    for part in parts:
+        data = part.encode("utf-8")
+        buf.append(data)
+        buffered += len(data)
+        if buffered >= size:
+            yield b"".join(buf)
+            buf, buffered = [], 0
+    if buf:
+        yield b"".join(buf)
+
+
+def _index_stream(random_recipe, add_error: Optional[str] = None) -> Iterator[bytes]:
+    # шапка уходит клиенту сразу, до обращения к БД
+    yield _head(add_error).encode("utf-8")
+    yield from _buffered(_index_body(random_recipe))
+
+
+def render_index(random_recipe=None, add_error: Optional[str] = None, status_code: int = 200) -> StreamingResponse:
+    """Главная страница, отдаваемая потоком."""
+    return StreamingResponse(_index_stream(random_recipe, add_error), status_code=status_code,
+                             media_type="text/html; charset=utf-8")
+
 
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
     """Главная страница с таблицей и графиком"""
-    recipes = controller.list_recipes()
-    stats = controller.activity_stats() or {}
-    return templates.TemplateResponse("index.html", {
-        "request": request,
-        "recipes": recipes,
-        "random_recipe": None,
-        "stats_json": json.dumps(stats)
-    })
+    return render_index()
 
 @app.post("/add", response_class=HTMLResponse)
-async def add_recipe(
+def add_recipe(
     request: Request,
     title: str = Form(...),
     ingredients: str = Form(""),
     steps: str = Form(""),
     tags: str = Form("")
 ):
-    """Добавление нового рецепта"""
+    """Добавление нового рецепта (обычный def: ожидание индекса дубликатов идёт в пуле потоков, не в цикле событий)"""
+    fetch = request.headers.get("x-requested-with") == "fetch"
     try:
-        controller.add_recipe(title, ingredients, steps, tags)
-    except Exception as e:
-        print(f"Ошибка добавления рецепта: {e}")
+        rid = controller.add_recipe(title, ingredients, steps, tags)
+    except DuplicateRecipeError as e:
+        error = str(e)
+        try:
+            error += f": «{controller.get_recipe(e.duplicate_of).title}»"
+        except RecipeError:
+            pass
+        if fetch:
+            return JSONResponse({"id": None, "error": error, "duplicate_of": e.duplicate_of}, status_code=409)
+        return render_index(add_error=error, status_code=409)
+    except RecipeError as e:
+        if fetch:
+            return JSONResponse({"id": None, "error": str(e)}, status_code=400)
+        return render_index(add_error=str(e), status_code=400)
 
-    recipes = controller.list_recipes()
-    stats = controller.activity_stats() or {}
-    return templates.TemplateResponse("index.html", {
-        "request": request,
-        "recipes": recipes,
-        "random_recipe": None,
-        "stats_json": json.dumps(stats)
-    })
+    # страница с подпиской на /events получит новую строку событием — перерисовка не нужна
+    if fetch:
+        return JSONResponse({"id": rid, "seq": controller.changes.last_seq}, status_code=201)
+    return render_index()
 
 @app.get("/random", response_class=HTMLResponse)
-async def random_recipe(request: Request, tag: str = None):
-    """Генерация случайного рецепта"""
+def random_recipe(request: Request, tag: str = None):
+    """Генерация случайного рецепта (def: обход id идёт в пуле потоков, не останавливая цикл событий и /events)"""
     recipe = None
     try:
         recipe = controller.random_recipe(tag)
     except Exception as e:
         print(f"Ошибка генерации: {e}")
 
-    recipes = controller.list_recipes()
-    stats = controller.activity_stats() or {}
-    return templates.TemplateResponse("index.html", {
-        "request": request,
-        "recipes": recipes,
-        "random_recipe": recipe,
-        "stats_json": json.dumps(stats)
-    })
+    return render_index(random_recipe=recipe)
+
+
+@app.get("/api/tags")
+def api_tags(prefix: str = "", limit: int = 10):
+    """Подсказки тегов по префиксу: [{"tag": ..., "count": ...}], самые частые первыми (def: до конца загрузки словаря ждёт пул потоков)"""
+    limit = max(1, min(limit, TAGS_MAX_LIMIT))
+    return JSONResponse([{"tag": tag, "count": count} for tag, count in controller.suggest_tags(prefix, limit)])
+
+
+async def _event_stream(request: Request, seq: int) -> AsyncIterator[str]:
+    loop = asyncio.get_running_loop()
+    wakeup = asyncio.Event()
+    # публикация идёт в потоке писателя — будим цикл событий потокобезопасно
+    unsubscribe = controller.changes.subscribe(lambda event: loop.call_soon_threadsafe(wakeup.set))
+    try:
+        while not await request.is_disconnected():
+            wakeup.clear()
+            events = controller.changes.since(seq)
+            if events is None:
+                # клиент отстал сильнее, чем хранит журнал
+                seq = controller.changes.last_seq
+                yield f"id: {seq}\nevent: reset\ndata: {{}}\n\n"
+                continue
+            for event in events:
+                seq = event.seq
+                yield f"id: {seq}\nevent: change\ndata: {json.dumps(event.to_dict(), ensure_ascii=False)}\n\n"
+            if events:
+                continue
+            try:
+                await asyncio.wait_for(wakeup.wait(), SSE_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+    finally:
+        unsubscribe()
+
+@app.get("/events")
+async def events(request: Request, since: Optional[int] = None, last_event_id: Optional[str] = Header(None)):
+    """Поток изменений (Server-Sent Events): insert/update/delete с номерами seq"""
+    if last_event_id and last_event_id.isdigit():
+        # переподключение EventSource — продолжаем с последнего полученного события
+        since = int(last_event_id)
+    if since is None:
+        since = controller.changes.last_seq
+    return StreamingResponse(
+        _event_stream(request, since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )